@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+
+import discord
+
+# --- Settings ---
+MAX_EMBEDS_PER_MESSAGE = 10 # Discord's limit
+# Discord rejects the whole message (400) if any embed exceeds these
+EMBED_TITLE_LIMIT = 256
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_FIELD_VALUE_LIMIT = 1024
+# After the first release arrives, wait this long for more so a burst goes out as fewer messages
+ANNOUNCE_LINGER_SECONDS = float(os.environ.get("ANNOUNCE_LINGER_SECONDS", 1.0))
+# A send that fails for a transient reason is retried for that channel after 1, 2, 4... times this,
+# up to ANNOUNCE_MAX_ATTEMPTS sends in total
+ANNOUNCE_RETRY_SECONDS = float(os.environ.get("ANNOUNCE_RETRY_SECONDS", 60))
+ANNOUNCE_MAX_ATTEMPTS = int(os.environ.get("ANNOUNCE_MAX_ATTEMPTS", 5))
+SPOTIFY_GREEN = 0x1DB954
+
+log = logging.getLogger(__name__)
+
+
+def truncate(text, limit):
+    """Shortens text to at most limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def release_embed(release, artist_name):
+    """Builds the embed for one release (album/single object from the Spotify API)."""
+    release_type = (release.get('album_type') or 'release').capitalize()
+    embed = discord.Embed(
+        title=truncate(release.get('name') or 'Unknown release', EMBED_TITLE_LIMIT), # Long classical titles
+        url=release.get('external_urls', {}).get('spotify'),
+        description=truncate(f"New {release_type} by **{artist_name}**", EMBED_DESCRIPTION_LIMIT),
+        color=SPOTIFY_GREEN,
+    )
+    if release.get('release_date'):
+        embed.add_field(name="Released", value=truncate(release['release_date'], EMBED_FIELD_VALUE_LIMIT))
+    images = release.get('images') or []
+    if images:
+        embed.set_thumbnail(url=(images[1] if len(images) > 1 else images[0])['url']) # Largest first; [1] is ~300px
+    return embed
+
+
+class _RetryTimer:
+    """Announcements waiting out a retry backoff, with the loop handle that re-queues them."""
+
+    def __init__(self, announcements):
+        self.announcements = announcements
+        self.handle = None
+
+
+class AnnouncementDispatcher:
+    """Queue that posts new releases to Discord independently of the Spotify sweep.
+
+    Releases are grouped per channel into messages of up to 10 embeds. Pacing is left to
+    discord.py, which already waits on each route's rate-limit bucket, so there are no fixed sleeps.
+    Failed sends are retried per (release, channel) with backoff; on_failed only hears about the
+    ones given up on (missing channel, no permission, rejected by Discord, or out of attempts).
+    """
+
+    def __init__(self, get_channel, on_sent=None, on_failed=None):
+        self.get_channel = get_channel # channel_id -> channel (e.g. bot.get_channel)
+        self.on_sent = on_sent # Called with (channel_id, announcements) after a successful send
+        self.on_failed = on_failed # Called with (channel_id, announcements) once they're given up on
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._retry_timers = set()
+        self.messages_sent = 0
+        self.announcements_sent = 0
+        self.retries = 0
+        self.failures = 0
+
+    def enqueue(self, channel_id, release, artist_name, artist_uri=None):
+        """Queues one release for a channel; returns immediately."""
+        self._queue.put_nowait({
+            'channel_id': channel_id,
+            'release': release,
+            'artist_name': artist_name,
+            'artist_uri': artist_uri,
+        })
+
+    def pending(self):
+        """Number of announcements waiting to be posted (including ones waiting to be retried)."""
+        return self._queue.qsize() + sum(len(timer.announcements) for timer in self._retry_timers)
+
+    def start(self):
+        """Starts the background posting task (no-op if it's already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            self._task.add_done_callback(self._task_done)
+
+    def _task_done(self, task):
+        # _run() loops forever, so any exit other than stop() means announcements have stopped going out
+        if task.cancelled():
+            return
+        log.critical("announce.dispatcher_stopped error=%r", task.exception(), exc_info=task.exception())
+
+    async def stop(self):
+        """Cancels the background task; anything still queued is left unsent."""
+        for timer in self._retry_timers:
+            timer.handle.cancel()
+        self._retry_timers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(ANNOUNCE_LINGER_SECONDS) # Let the rest of a burst arrive
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            by_channel = {}
+            for announcement in batch:
+                by_channel.setdefault(announcement['channel_id'], []).append(announcement)
+            # Channels are independent routes in Discord's rate limiter, so post to them concurrently
+            results = await asyncio.gather(*(self._post(channel_id, items) for channel_id, items in by_channel.items()),
+                                           return_exceptions=True)
+            for channel_id, result in zip(by_channel, results):
+                # Log and keep going: one channel's error must not stop announcements for everyone
+                if isinstance(result, Exception):
+                    log.error("announce.post_failed channel=%s error=%s: %s", channel_id, type(result).__name__, result,
+                              exc_info=result)
+
+    async def _post(self, channel_id, announcements):
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            log.error("announce.channel_not_found channel=%s announcements=%d", channel_id, len(announcements))
+            self._failed(channel_id, announcements)
+            return
+        for start in range(0, len(announcements), MAX_EMBEDS_PER_MESSAGE):
+            chunk = announcements[start:start + MAX_EMBEDS_PER_MESSAGE]
+            content = "🚨 **New Release!** 🚨" if len(chunk) == 1 else f"🚨 **{len(chunk)} New Releases!** 🚨"
+            try:
+                embeds = [release_embed(a['release'], a['artist_name']) for a in chunk]
+                await channel.send(content=content, embeds=embeds)
+            except discord.errors.Forbidden:
+                log.error("announce.forbidden channel=%s", channel_id)
+                # Stop trying for this channel if permissions are wrong
+                self._failed(channel_id, announcements[start:])
+                return
+            except discord.errors.HTTPException as send_e:
+                if send_e.status == 429 or not 400 <= send_e.status < 500:
+                    log.warning("announce.send_failed channel=%s status=%s error=%s", channel_id, send_e.status, send_e)
+                    self._retry(channel_id, chunk)
+                    continue
+                # Discord rejected the message itself, so resending it can't work; find the release it was about
+                if len(chunk) > 1:
+                    log.warning("announce.rejected channel=%s releases=%d status=%s, sending one by one", channel_id,
+                                len(chunk), send_e.status)
+                    for announcement in chunk:
+                        await self._post(channel_id, [announcement])
+                    continue
+                log.error("announce.rejected channel=%s release=%s status=%s error=%s", channel_id,
+                          chunk[0]['release'].get('id'), send_e.status, send_e)
+                self._failed(channel_id, chunk)
+                continue
+            except Exception as send_e:
+                log.warning("announce.send_failed channel=%s error=%s: %s", channel_id, type(send_e).__name__, send_e)
+                self._retry(channel_id, chunk)
+                continue
+            self.messages_sent += 1
+            self.announcements_sent += len(chunk)
+            log.info("announce.sent channel=%s releases=%d", channel_id, len(chunk))
+            if self.on_sent is not None:
+                try:
+                    self.on_sent(channel_id, chunk)
+                except Exception:
+                    log.exception("announce.on_sent_failed channel=%s releases=%d", channel_id, len(chunk))
+
+    def _retry(self, channel_id, announcements):
+        """Queues announcements again after a backoff, or gives up on those out of attempts."""
+        for announcement in announcements:
+            announcement['attempts'] = announcement.get('attempts', 0) + 1
+        gave_up = [a for a in announcements if a['attempts'] >= ANNOUNCE_MAX_ATTEMPTS]
+        retry = [a for a in announcements if a['attempts'] < ANNOUNCE_MAX_ATTEMPTS]
+        if gave_up:
+            log.error("announce.gave_up channel=%s releases=%d attempts=%d", channel_id, len(gave_up), ANNOUNCE_MAX_ATTEMPTS)
+            self._failed(channel_id, gave_up)
+        if not retry:
+            return
+        self.retries += len(retry)
+        delay = ANNOUNCE_RETRY_SECONDS * 2 ** (retry[0]['attempts'] - 1)
+        timer = _RetryTimer(retry)
+
+        def requeue():
+            self._retry_timers.discard(timer)
+            for announcement in timer.announcements:
+                self._queue.put_nowait(announcement)
+
+        timer.handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_timers.add(timer)
+
+    def _failed(self, channel_id, announcements):
+        self.failures += len(announcements)
+        if self.on_failed is not None:
+            try:
+                self.on_failed(channel_id, announcements)
+            except Exception:
+                log.exception("announce.on_failed_failed channel=%s releases=%d", channel_id, len(announcements))
@@ -0,0 +1,70 @@
+import os
+import time
+from collections import OrderedDict
+
+# --- Settings ---
+# Artist names rarely change, so entries live for a day by default
+ARTIST_CACHE_TTL = float(os.environ.get("ARTIST_CACHE_TTL", 24 * 60 * 60))
+ARTIST_CACHE_MAX_SIZE = int(os.environ.get("ARTIST_CACHE_MAX_SIZE", 5000))
+
+
+class ArtistCache:
+    """Bounded artist-metadata cache keyed by artist URI, with TTL expiry and LRU eviction."""
+
+    def __init__(self, max_size=ARTIST_CACHE_MAX_SIZE, ttl=ARTIST_CACHE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict() # uri -> (expires_at, artist); oldest use first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, uri):
+        """Returns the cached artist for uri, or None if missing/expired (counts hit or miss)."""
+        entry = self._entries.get(uri)
+        if entry is not None:
+            expires_at, artist = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(uri)
+                self.hits += 1
+                return artist
+            del self._entries[uri] # Expired
+        self.misses += 1
+        return None
+
+    def peek(self, uri):
+        """Returns the cached artist for uri without counting a hit/miss or refreshing its LRU position."""
+        entry = self._entries.get(uri)
+        if entry is not None and entry[0] > self._clock():
+            return entry[1]
+        return None
+
+    def put(self, uri, artist):
+        """Stores the fields we use from an artist object, evicting the least recently used."""
+        if not artist:
+            return
+        slim = {'id': artist.get('id'), 'name': artist.get('name')}
+        self._entries[uri] = (self._clock() + self.ttl, slim)
+        self._entries.move_to_end(uri)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, uri):
+        """Drops uri from the cache if present."""
+        self._entries.pop(uri, None)
+
+    def stats(self):
+        """Returns hit/miss counters; every hit is one Spotify lookup saved."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,140 @@
+import bisect
+
+import discord
+
+# --- Settings ---
+ARTISTS_PER_PAGE = 20
+LIST_VIEW_TIMEOUT = 180 # Seconds before the page buttons stop working
+
+
+class ArtistIndex:
+    """Locally stored artist names with a sorted lowercase index for listing and search.
+
+    Keeps (lowercase name, uri) pairs sorted, so listing needs no sort and prefix search is a bisect.
+    """
+
+    def __init__(self, names=None):
+        self._names = {} # uri -> display name or None
+        self._keys = {} # uri -> its (lowercase name, uri) entry in _sorted
+        self._sorted = []
+        for uri, name in (names or {}).items():
+            self._names[uri] = name
+            self._keys[uri] = (self._sort_name(uri, name), uri)
+        self._sorted = sorted(self._keys.values())
+
+    @staticmethod
+    def _sort_name(uri, name):
+        return (name or uri.split(':')[-1]).lower()
+
+    def __contains__(self, uri):
+        return uri in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def get(self, uri):
+        """Returns the stored name for uri (None if unknown or not resolved yet)."""
+        return self._names.get(uri)
+
+    def set(self, uri, name):
+        """Adds or renames an artist, keeping the index sorted."""
+        if uri in self._names:
+            if self._names[uri] == name:
+                return
+            self._remove_key(uri)
+        self._names[uri] = name
+        key = (self._sort_name(uri, name), uri)
+        self._keys[uri] = key
+        bisect.insort(self._sorted, key)
+
+    def remove(self, uri):
+        """Drops an artist from the index."""
+        if uri in self._names:
+            self._remove_key(uri)
+            del self._names[uri]
+
+    def _remove_key(self, uri):
+        key = self._keys.pop(uri)
+        i = bisect.bisect_left(self._sorted, key)
+        if i < len(self._sorted) and self._sorted[i] == key:
+            del self._sorted[i]
+
+    def items(self):
+        """(uri, name) pairs in alphabetical order."""
+        return [(uri, self._names[uri]) for _, uri in self._sorted]
+
+    def search(self, query="", uris=None, predicate=None):
+        """Returns matching URIs alphabetically, name-prefix matches before other substring matches.
+
+        `uris` limits results to a set (e.g. one channel's artists); `predicate(uri)` is an extra filter.
+        """
+        def wanted(uri):
+            return (uris is None or uri in uris) and (predicate is None or predicate(uri))
+
+        query = query.lower().strip()
+        if not query:
+            return [uri for _, uri in self._sorted if wanted(uri)]
+        start = bisect.bisect_left(self._sorted, (query,))
+        prefix = []
+        for name, uri in self._sorted[start:]:
+            if not name.startswith(query):
+                break
+            if wanted(uri):
+                prefix.append(uri)
+        prefix_set = set(prefix)
+        substring = [uri for name, uri in self._sorted
+                     if query in name and uri not in prefix_set and wanted(uri)]
+        return prefix + substring
+
+
+class ArtistListView(discord.ui.View):
+    """Previous/next buttons that page through an already computed artist list."""
+
+    def __init__(self, author_id, title, lines):
+        super().__init__(timeout=LIST_VIEW_TIMEOUT)
+        self.author_id = author_id
+        self.title = title
+        self.lines = lines
+        self.page = 0
+        self.pages = max(1, -(-len(lines) // ARTISTS_PER_PAGE))
+        self.message = None
+        self._update_buttons()
+
+    def embed(self):
+        """Builds the embed for the current page."""
+        start = self.page * ARTISTS_PER_PAGE
+        embed = discord.Embed(title=self.title, description="\n".join(self.lines[start:start + ARTISTS_PER_PAGE]),
+                              color=0x1DB954)
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} · {len(self.lines)} artist(s)")
+        return embed
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the person who ran the command can flip pages.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        self.page = max(0, self.page - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        self.page = min(self.pages - 1, self.page + 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass # Message deleted or no longer editable
@@ -0,0 +1,330 @@
+"""Offline benchmark: drives the bot against a fake Spotify API and fake Discord channels.
+
+Nothing touches the network and no tokens are needed. Example:
+
+    python benchmark.py --artists 10000 --latency 0.05 --throttle-every 500 --json bench.json
+
+Reports wall time, Spotify requests (and injected 429s), peak memory and event-loop lag for each
+phase: adding artists with !addartists, the first (baseline) sweep, a sweep after new releases
+appeared, a sweep where nothing changed, and a few !listartists searches.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import spotipy
+
+# --- Settings ---
+LINKS_PER_MESSAGE = 35 # ~53-character links fit about this many into one 2000-character Discord message
+LIST_QUERIES = ["", "artist 01", "--days 30"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmark with fake Spotify and Discord backends.")
+    parser.add_argument("--artists", type=int, default=10000, help="Synthetic catalog size")
+    parser.add_argument("--max-releases", type=int, default=60, help="Releases per artist are drawn from 1..N")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake Spotify request")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="Seconds per fake Discord send")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth Spotify request with a 429 (0: never)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--rps", type=float, default=200, help="Client-side Spotify request budget (requests/second)")
+    parser.add_argument("--new-release-fraction", type=float, default=0.02, help="Share of artists that get a new single")
+    parser.add_argument("--trace-memory", action="store_true", help="Per-phase Python heap peaks via tracemalloc (slower)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+# --- Fake Spotify ---
+
+class FakeSpotify:
+    """Stands in for spotipy.Spotify (the blocking client AsyncSpotify runs on its worker threads)."""
+
+    def __init__(self, catalog, names, latency=0.0, throttle_every=0, retry_after=1.0):
+        self.catalog = catalog # artist_id -> releases, albums first then singles, newest first within each
+        self.names = names # artist_id -> name
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_every and self.requests % self.throttle_every == 0
+            if throttle:
+                self.throttled += 1
+        time.sleep(self.latency)
+        if throttle:
+            raise spotipy.SpotifyException(429, -1, "API rate limit exceeded",
+                                           headers={'Retry-After': str(self.retry_after)})
+
+    def _artist(self, artist_id):
+        if artist_id not in self.names:
+            return None
+        return {'id': artist_id, 'name': self.names[artist_id], 'uri': f"spotify:artist:{artist_id}"}
+
+    def artist(self, artist_id):
+        self._request()
+        return self._artist(artist_id.split(':')[-1])
+
+    def artists(self, artist_ids):
+        self._request()
+        return {'artists': [self._artist(artist_id) for artist_id in artist_ids]}
+
+    def artist_albums(self, artist_id, include_groups=None, country=None, limit=20, offset=0, **kwargs):
+        self._request()
+        releases = self.catalog.get(artist_id, [])
+        return {
+            'items': releases[offset:offset + limit],
+            'total': len(releases),
+            'next': 'next' if offset + limit < len(releases) else None,
+        }
+
+
+def random_id(rng):
+    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+    return ''.join(rng.choice(alphabet) for _ in range(22))
+
+
+def make_release(rng, artist_id, album_type, release_date):
+    release_id = random_id(rng)
+    return {
+        'id': release_id,
+        'name': f"Release {release_id[:6]}",
+        'album_type': album_type,
+        'release_date': release_date,
+        'external_urls': {'spotify': f"https://open.spotify.com/album/{release_id}"},
+        'images': [],
+        'artists': [{'uri': f"spotify:artist:{artist_id}"}],
+    }
+
+
+def build_catalog(rng, artist_count, max_releases):
+    """Synthetic discographies, all released at least 30 days ago (so the baseline announces nothing)."""
+    catalog = {}
+    names = {}
+    today = datetime.date.today()
+    for n in range(artist_count):
+        artist_id = random_id(rng)
+        names[artist_id] = f"Artist {n:05d}"
+        releases = []
+        for _ in range(rng.randint(1, max_releases)):
+            release_date = (today - datetime.timedelta(days=rng.randint(30, 20 * 365))).isoformat()
+            releases.append(make_release(rng, artist_id, rng.choice(('album', 'single', 'single')), release_date))
+        albums = sorted((r for r in releases if r['album_type'] == 'album'), key=lambda r: r['release_date'], reverse=True)
+        singles = sorted((r for r in releases if r['album_type'] != 'album'), key=lambda r: r['release_date'], reverse=True)
+        catalog[artist_id] = albums + singles
+    return catalog, names
+
+
+def add_new_singles(rng, catalog, fraction):
+    """Gives a share of artists a single released today; it lands behind their albums, as on Spotify."""
+    today = datetime.date.today().isoformat()
+    chosen = rng.sample(sorted(catalog), max(1, int(len(catalog) * fraction)))
+    for artist_id in chosen:
+        releases = catalog[artist_id]
+        albums = [r for r in releases if r['album_type'] == 'album']
+        catalog[artist_id] = albums + [make_release(rng, artist_id, 'single', today)] + releases[len(albums):]
+    return len(chosen)
+
+
+# --- Fake Discord ---
+
+class FakeChannel:
+    def __init__(self, channel_id, latency=0.0):
+        self.id = channel_id
+        self.latency = latency
+        self.messages = 0
+        self.embeds = 0
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, file=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.messages += 1
+        self.embeds += len(embeds or ()) + (1 if embed is not None else 0)
+        return FakeMessage()
+
+
+class FakeMessage:
+    async def edit(self, **kwargs):
+        pass
+
+
+class FakeUser:
+    id = 1
+
+
+class FakeContext:
+    """Just enough of commands.Context for the command callbacks."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.guild = None
+        self.author = FakeUser()
+        self.message = None
+
+    async def send(self, *args, **kwargs):
+        return await self.channel.send(*args, **kwargs)
+
+
+# --- Measurement ---
+
+class Phase:
+    """Measures one benchmark phase: wall time, Spotify requests, memory and event-loop lag."""
+
+    def __init__(self, name, fake_spotify, trace_memory, lag_monitor_cls):
+        self.name = name
+        self.fake_spotify = fake_spotify
+        self.trace_memory = trace_memory
+        self.lag = lag_monitor_cls(interval=0.01)
+        self.result = {'phase': name}
+
+    async def __aenter__(self):
+        self._requests = self.fake_spotify.requests
+        self._throttled = self.fake_spotify.throttled
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self.lag.start()
+        self._started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc):
+        wall = time.perf_counter() - self._started
+        await self.lag.stop()
+        self.result.update({
+            'wall_seconds': round(wall, 3),
+            'spotify_requests': self.fake_spotify.requests - self._requests,
+            'throttled_429': self.fake_spotify.throttled - self._throttled,
+            'loop_lag_max_ms': round(self.lag.max * 1000, 1),
+            'loop_lag_p95_ms': round((self.lag.histogram.quantile(0.95) or 0) * 1000, 1),
+            'peak_rss_mib': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), # KiB on Linux
+        })
+        if self.trace_memory:
+            self.result['peak_heap_mib'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        return False
+
+
+async def drain(dispatcher, quiet_seconds):
+    """Waits until the announcement queue is empty and nothing was posted for quiet_seconds."""
+    last = None
+    while dispatcher.pending() or dispatcher.announcements_sent + dispatcher.failures != last:
+        last = dispatcher.announcements_sent + dispatcher.failures
+        await asyncio.sleep(quiet_seconds)
+
+
+def print_results(results):
+    columns = ['phase', 'wall_seconds', 'spotify_requests', 'throttled_429', 'loop_lag_p95_ms', 'loop_lag_max_ms',
+               'peak_rss_mib', 'peak_heap_mib', 'notes']
+    columns = [c for c in columns if any(c in r for r in results)]
+    widths = {c: max(len(c), *(len(str(r.get(c, ''))) for r in results)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in results:
+        print("  ".join(str(r.get(c, '')).ljust(widths[c]) for c in columns))
+
+
+async def run(args):
+    import announcer
+    import bot
+    from metrics import Histogram, LoopLagMonitor
+    from rate_limit import TokenBucket
+    from spotify_client import AsyncSpotify
+
+    rng = random.Random(args.seed)
+    catalog, names = build_catalog(rng, args.artists, args.max_releases)
+    fake_spotify = FakeSpotify(catalog, names, args.latency, args.throttle_every, args.retry_after)
+    channel = FakeChannel(1000, args.discord_latency)
+
+    bot.load_state()
+    bot.spotify = AsyncSpotify(fake_spotify, artist_cache=bot.artist_cache,
+                               rate_limiter=TokenBucket(rate=args.rps, capacity=args.rps),
+                               retry_policy=bot.spotify_retry_policy)
+    bot.dispatcher.get_channel = {channel.id: channel}.get
+    bot.dispatcher.start()
+    ctx = FakeContext(channel)
+    results = []
+
+    def phase(name):
+        return Phase(name, fake_spotify, args.trace_memory, LoopLagMonitor)
+
+    links = [f"https://open.spotify.com/artist/{artist_id}" for artist_id in catalog]
+    command_times = Histogram()
+    async with phase("add_artists") as p:
+        for start in range(0, len(links), LINKS_PER_MESSAGE):
+            started = time.perf_counter()
+            await bot.add_artists.callback(ctx, artist_links=" ".join(links[start:start + LINKS_PER_MESSAGE]))
+            command_times.observe(time.perf_counter() - started)
+    p.result['notes'] = (f"{command_times.count} commands, p95 {command_times.quantile(0.95) * 1000:.0f} ms, "
+                         f"{len(bot.artists_to_track_set)} tracked")
+    results.append(p.result)
+
+    async with phase("sweep_baseline") as p:
+        await bot.check_new_releases() # Every new artist is due: pages whole discographies
+    results.append(p.result)
+
+    new_count = add_new_singles(rng, catalog, args.new_release_fraction)
+    all_uris = sorted(bot.artists_to_track_set)
+    sent_before = bot.dispatcher.announcements_sent
+    async with phase("sweep_new_releases") as p:
+        await bot.check_new_releases(all_uris)
+        # Include posting, so the number covers discovery to Discord
+        await drain(bot.dispatcher, announcer.ANNOUNCE_LINGER_SECONDS + 2 * args.discord_latency)
+    p.result['notes'] = f"{new_count} new singles, {bot.dispatcher.announcements_sent - sent_before} announced"
+    results.append(p.result)
+
+    async with phase("sweep_unchanged") as p:
+        await bot.check_new_releases(all_uris)
+    results.append(p.result)
+
+    list_times = Histogram()
+    async with phase("list_artists") as p:
+        for query in LIST_QUERIES:
+            started = time.perf_counter()
+            await bot.list_artists.callback(ctx, query=query)
+            list_times.observe(time.perf_counter() - started)
+    p.result['notes'] = f"{list_times.count} queries, max {list_times.max * 1000:.1f} ms"
+    results.append(p.result)
+
+    await bot.dispatcher.stop()
+    bot.spotify.close()
+    return results
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="spotify-bot-bench-")
+    # Point persistence at a scratch directory before the bot modules read their settings
+    os.environ["BOT_DB_PATH"] = os.path.join(workdir, "bot_data.sqlite3")
+    os.environ["LEGACY_ARTIST_FILE"] = os.path.join(workdir, "tracked_artists.json")
+    os.environ["SPOTIFY_CACHE_URL"] = "memory"
+    os.environ.setdefault("ANNOUNCE_LINGER_SECONDS", "0.05")
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper())
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nBenchmark: {args.artists} artists, {args.latency * 1000:.0f} ms Spotify latency, "
+          f"{'429 every ' + str(args.throttle_every) + ' requests' if args.throttle_every else 'no 429s'}, "
+          f"{args.rps:g} req/s budget\n")
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,41 +4,177 @@ import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials # Use Client Credentials Flow
 import os
 import asyncio
+import time
+import datetime
+import random
 import re # Import regex for link parsing
 import traceback # Import for detailed error logging
+import io
+import csv
+import json
+import logging
+import math
+from spotify_client import AsyncSpotify, build_session, ARTISTS_BATCH_SIZE # Async wrapper so Spotify calls don't block the event loop
+from artist_cache import ArtistCache # TTL/LRU cache for artist names
+from rate_limit import TokenBucket # Shared Spotify request budget
+from retry_policy import RetryPolicy # Retry-After / backoff handling for Spotify errors
+from sweep import run_sweep # Concurrent per-artist release checks
+from storage import Storage # SQLite persistence for artists and announced releases
+from release_dedup import ReleaseIdSet, RELEASE_DEDUP_WINDOW_DAYS # Compact announced-ID set
+from release_scan import scan_artist # Incremental, high-water-mark based release detection
+from scheduler import PollScheduler, activity_interval, in_release_window # Per-artist adaptive polling
+from announcer import AnnouncementDispatcher # Batched embed announcements
+from artist_list import ArtistIndex, ArtistListView # Local artist search + paginated list view
+from shared_cache import open_cache, SharedTokenCacheHandler # Token + response cache shared across restarts
+from startup_timing import startup_timer # Startup phase breakdown
+from metrics import LoopLagMonitor, SweepStats, Timings, render_prometheus # Loop lag, sweep counters, latency histograms
+from keep_alive import start_server # aiohttp health/metrics server on the bot's event loop
+from worker import SWEEP_WORKERS, WORKER_TIMEOUT # Optional worker mode: sweep sharded across processes
+from release_feed import BURST_MODE, BURST_INTERVAL_MINUTES, scan_release_feeds # Release-day fast path
+from spotify_links import classify_artists, extract_links, parse_artist_links # Shared, precompiled link parsing
 
 # --- Environment Variables / Secrets ---
 DISCORD_TOKEN = os.environ.get("DISCORD_TOKEN")
 SPOTIPY_CLIENT_ID = os.environ.get("SPOTIPY_CLIENT_ID")
 SPOTIPY_CLIENT_SECRET = os.environ.get("SPOTIPY_CLIENT_SECRET")
 # !!! REPLACE with your actual Discord Channel ID (as an integer) !!!
+# Artists tracked before per-channel subscriptions existed are subscribed to this channel
 NOTIFICATION_CHANNEL_ID = 1430238059533832352 # Use the actual ID here
+# /healthz fails if the release loop hasn't completed a tick for this long (a first full sweep can take a while)
+HEALTH_MAX_SWEEP_AGE = int(os.environ.get("HEALTH_MAX_SWEEP_AGE", 30 * 60))
+# DEBUG adds per-artist/per-command detail; messages are only formatted for enabled levels
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Worker mode: how often the bot picks up releases queued by the sweep workers
+RELEASE_QUEUE_POLL_SECONDS = float(os.environ.get("RELEASE_QUEUE_POLL_SECONDS", 5))
+
+log = logging.getLogger("bot")
 
 # --- Global Variables ---
-# Use a set to store artist URIs for easy adding/removing and avoiding duplicates
+# Use a set to store artist URIs for easy adding/removing and avoiding duplicates.
+# This is the union over all channels: each artist is swept once however many channels follow it.
 # !!! REPLACE with your initial Spotify Artist URIs or leave empty !!!
 artists_to_track_set = {
     # "spotify:artist:ExampleArtistID1",
     # "spotify:artist:ExampleArtistID2"
 }
 
-# Use a set to store IDs of already announced releases
-announced_release_ids = set()
+# IDs of already announced releases (a compact ReleaseIdSet, loaded from storage by load_state())
+announced_release_ids = ReleaseIdSet()
+
+# Artist metadata (names) keyed by URI; filled by !addartists, read by the sweep and list/remove
+artist_cache = ArtistCache()
+
+# --- Persistence ---
+# Tracked artists and announced releases live in SQLite; every change is written through immediately.
+# Nothing is opened at import time: run_bot() calls load_state() to fill these in.
+storage = None
+artist_index = ArtistIndex() # Local names + sorted search index; !listartists never calls Spotify
+channel_subscriptions = {} # artist_uri -> set of channel IDs to notify
+artists_by_channel = {} # channel_id -> set of artist URIs (reverse of channel_subscriptions)
+artist_states = {} # Per-artist high-water marks
+last_eviction = 0.0 # When announced_release_ids was last pruned
+# Each artist gets its own next-check time
+scheduler = PollScheduler()
+
+
+def load_state():
+    """Opens the database and loads tracked artists, subscriptions and announced releases into memory."""
+    global storage, artist_index, artists_to_track_set, channel_subscriptions, artists_by_channel
+    global announced_release_ids, artist_states, scheduler
+    storage = Storage()
+    storage.import_legacy_json() # One-time migration from the old tracked_artists.json format
+    storage.add_artists((uri, None) for uri in artists_to_track_set) # Seed any URIs hard-coded above
+    storage.subscribe(NOTIFICATION_CHANNEL_ID, None, storage.unsubscribed_artists()) # Legacy single-channel list
+    stored_artists = storage.load_artists()
+    artist_index = ArtistIndex(stored_artists)
+    artists_to_track_set = set(stored_artists)
+    channel_subscriptions = storage.load_subscriptions()
+    artists_by_channel = {}
+    for uri, channels in channel_subscriptions.items():
+        for channel_id in channels:
+            artists_by_channel.setdefault(channel_id, set()).add(uri)
+    announced_release_ids = ReleaseIdSet.from_rows(storage.load_announced_releases())
+    artist_states = storage.load_artist_states()
+    # Announcements still waiting from before a restart go out first; they stay claimed meanwhile
+    pending = storage.pending_announcements()
+    for announcement in pending:
+        announced_release_ids.add(announcement[1]['id'])
+        dispatcher.enqueue(*announcement)
+    if pending:
+        log.info("state.pending_announcements announcements=%d", len(pending))
+
+    # After a restart, spread known artists over their interval
+    scheduler = PollScheduler()
+    for uri in artists_to_track_set:
+        state = artist_states.get(uri)
+        if state:
+            scheduler.add(uri, time.time() + random.uniform(0, activity_interval(state['latest_release_date'], time.time())))
+        else:
+            scheduler.add(uri) # Never checked: due now
+    for uri, name in stored_artists.items():
+        if name:
+            artist_cache.put(uri, {'id': uri.split(':')[-1], 'name': name})
+    log.info("state.loaded artists=%d subscriptions=%d announced_releases=%d db=%s", len(artists_to_track_set),
+             sum(map(len, channel_subscriptions.values())), len(announced_release_ids), storage.path)
+
+
+# One request budget shared by the sweep and the commands
+spotify_rate_limiter = TokenBucket()
+# Honors 429 Retry-After for all callers at once and backs off on 5xx
+spotify_retry_policy = RetryPolicy()
 
 # --- Spotify Authentication ---
-sp = None # Initialize sp to None
-try:
-    if SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET:
-        auth_manager = SpotifyClientCredentials(client_id=SPOTIPY_CLIENT_ID, client_secret=SPOTIPY_CLIENT_SECRET)
-        sp = spotipy.Spotify(auth_manager=auth_manager)
-        # Test connection by fetching a known artist (optional but good for debugging)
-        sp.artist("spotify:artist:06HL4z0CvFAxyc27GXpf02") # Example: Tame Impala ID
-        print("✅ Spotify connection successful using Client Credentials.")
-    else:
-        print("⚠️ Spotify Client ID or Secret not found in environment variables.")
-except Exception as e:
-    print(f"❌ Error initializing Spotify Client Credentials: {e}")
-    sp = None # Ensure sp is None if auth fails
+# Built on first use by get_spotify(); nothing talks to Spotify until the bot is connected to Discord
+sp = None
+spotify = None # Async access layer around sp; all coroutines go through this
+SPOTIFY_HEALTH_CHECK_ARTIST = "spotify:artist:06HL4z0CvFAxyc27GXpf02" # Known artist fetched once after login
+
+
+def get_spotify():
+    """Returns the AsyncSpotify client, constructing it on first call (None without credentials).
+
+    Construction is local only; the access token is fetched (or reused from the shared cache) on
+    the first request.
+    """
+    global sp, spotify
+    if spotify is not None:
+        return spotify
+    if not (SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET):
+        log.warning("spotify.no_credentials SPOTIPY_CLIENT_ID/SPOTIPY_CLIENT_SECRET not set")
+        return None
+    try:
+        # The access token and album responses live in a shared cache, so restarts/replicas start warm
+        spotify_cache = open_cache()
+        auth_manager = SpotifyClientCredentials(client_id=SPOTIPY_CLIENT_ID, client_secret=SPOTIPY_CLIENT_SECRET,
+                                                cache_handler=SharedTokenCacheHandler(spotify_cache, SPOTIPY_CLIENT_ID))
+        sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=build_session())
+        spotify = AsyncSpotify(sp, artist_cache=artist_cache, rate_limiter=spotify_rate_limiter,
+                               retry_policy=spotify_retry_policy, response_cache=spotify_cache)
+    except Exception as e:
+        log.error("spotify.init_failed error=%s: %s", type(e).__name__, e)
+        sp = None # Ensure sp is None if construction fails
+        spotify = None
+    return spotify
+
+
+async def check_spotify_connection():
+    """Fetches a known artist to confirm the credentials work; returns True on success.
+
+    Runs after login instead of at import, so a slow or failing Spotify doesn't hold up the gateway connection.
+    """
+    client = get_spotify()
+    if client is None:
+        return False
+    startup_timer.start("auth")
+    try:
+        await client.artist(SPOTIFY_HEALTH_CHECK_ARTIST) # Example: Tame Impala ID
+    except Exception as e:
+        log.error("spotify.check_failed error=%s: %s", type(e).__name__, e)
+        return False
+    finally:
+        startup_timer.end("auth")
+    log.info("spotify.connected auth=client_credentials")
+    return True
 
 # --- Discord Bot Setup ---
 intents = discord.Intents.default()
@@ -49,180 +185,533 @@ bot = commands.Bot(command_prefix="!", intents=intents) # Define command prefix
 
 # --- Bot Functions & Background Task ---
 
-async def check_new_releases():
-    """Checks Spotify for new releases from tracked artists."""
+def on_announcements_sent(channel_id, announcements):
+    """Persists releases once Discord accepted the message (and drops them from the outbox)."""
+    storage.complete_announcements(channel_id, ((a['release']['id'], a['artist_uri']) for a in announcements))
+
+
+def on_announcements_failed(channel_id, announcements):
+    """Drops a channel's outbox rows once the dispatcher gives up on them (after its own retries).
+
+    Only this channel's rows are touched: the release stays claimed and known, so other channels'
+    deliveries, done or pending, are unaffected and nothing is posted twice.
+    """
+    release_ids = [a['release']['id'] for a in announcements]
+    storage.drop_announcements(channel_id, release_ids)
+    log.error("announce.dropped channel=%s releases=%s", channel_id, ",".join(release_ids))
+
+
+def subscribe_channel(channel_id, guild_id, artists):
+    """Subscribes a channel to (artist_uri, name) pairs, tracking any artist that's new to the bot."""
+    artists = list(artists)
+    new_artists = [(uri, name) for uri, name in artists if uri not in artists_to_track_set]
+    storage.add_artists(new_artists) # Write-through so the list survives restarts
+    storage.subscribe(channel_id, guild_id, [uri for uri, _ in artists])
+    for uri, name in artists:
+        channel_subscriptions.setdefault(uri, set()).add(channel_id)
+        artists_by_channel.setdefault(channel_id, set()).add(uri)
+        if name or uri not in artist_index:
+            artist_index.set(uri, name or None)
+    for uri, _ in new_artists:
+        artists_to_track_set.add(uri)
+        scheduler.add(uri) # First check (baseline) on the next tick
+
+
+def unsubscribe_channel(channel_id, artist_uris):
+    """Unsubscribes a channel; artists no channel follows any more stop being swept."""
+    artist_uris = list(artist_uris)
+    storage.unsubscribe(channel_id, artist_uris)
+    orphaned = []
+    for uri in artist_uris:
+        artists_by_channel.get(channel_id, set()).discard(uri)
+        channels = channel_subscriptions.get(uri)
+        if channels is not None:
+            channels.discard(channel_id)
+            if not channels:
+                del channel_subscriptions[uri]
+                orphaned.append(uri)
+    storage.remove_artists(orphaned)
+    for uri in orphaned:
+        artists_to_track_set.discard(uri)
+        artist_index.remove(uri)
+        artist_states.pop(uri, None)
+        scheduler.remove(uri)
+
+
+def channel_artist_uris(channel_id):
+    """Returns the artist URIs a channel is subscribed to."""
+    return set(artists_by_channel.get(channel_id, ()))
+
+
+async def verify_and_subscribe(channel_id, guild_id, artist_uris):
+    """Subscribes a channel to many artists, verifying only the ones new to the bot (50 per request).
+
+    Returns {'added': [names], 'already': count, 'failed': [uris not found on Spotify],
+    'errors': {uri: exception}}. A batch whose lookup fails only fails its own URIs (in 'errors');
+    everything else is still subscribed.
+    """
+    already, known, new = classify_artists(artist_uris, channel_artist_uris(channel_id), artists_to_track_set)
+    # Artists another channel already tracks were verified when they were added; only new ones cost requests
+    batches = [new[start:start + ARTISTS_BATCH_SIZE] for start in range(0, len(new), ARTISTS_BATCH_SIZE)]
+    results = await asyncio.gather(*(spotify.artists_by_uri(batch) for batch in batches), return_exceptions=True)
+    artist_infos = {}
+    errors = {}
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            log.warning("verify.batch_failed artists=%d error=%s: %s", len(batch), type(result).__name__, result)
+            errors.update(dict.fromkeys(batch, result))
+        else:
+            artist_infos.update(result)
+    verified = [(uri, None) for uri in known]
+    verified.extend((uri, artist_infos[uri].get('name')) for uri in new if artist_infos.get(uri))
+    failed = [uri for uri in new if uri not in errors and not artist_infos.get(uri)]
+    subscribe_channel(channel_id, guild_id, verified)
+    return {'added': [name or artist_display_name(uri) for uri, name in verified], 'already': len(already),
+            'failed': failed, 'errors': errors}
+
+
+def describe_lookup_error(error):
+    """Short, user-facing description of a failed Spotify lookup."""
+    if isinstance(error, spotipy.exceptions.SpotifyException):
+        return f"Spotify API Error (Status: {error.http_status}, Code: {error.code}, Reason: {error.msg})"
+    return f"Error Type: {type(error).__name__}"
+
+
+def artist_display_name(uri):
+    """Best locally known name for an artist (no API calls)."""
+    name = artist_index.get(uri)
+    if not name:
+        name = (artist_cache.peek(uri) or {}).get('name')
+    return name or uri.split(':')[-1]
+
+
+# Posts releases to Discord as embeds, decoupled from (and overlapping with) the Spotify sweep
+dispatcher = AnnouncementDispatcher(bot.get_channel, on_sent=on_announcements_sent,
+                                    on_failed=on_announcements_failed)
+
+# --- Health & Metrics ---
+sweep_stats = SweepStats()
+loop_lag = LoopLagMonitor()
+sweep_timings = Timings() # Per-artist fetch/dedup/announce phases, plus name resolution, sweeps and bursts
+burst_stats = {'runs': 0, 'pages': 0, 'albums': 0, 'announced': 0} # Release-feed burst totals
+command_timings = Timings() # One histogram per command
+health_server = None # aiohttp AppRunner, started in setup_hook
+
+
+def health_status():
+    """(healthy, details) for /healthz: connected to the gateway and the release loop is ticking."""
+    latency = bot.latency
+    connected = bot.is_ready() and not bot.is_closed() and math.isfinite(latency)
+    since_sweep = sweep_stats.seconds_since_success()
+    if since_sweep is None:
+        sweep_ok = startup_timer.total() <= HEALTH_MAX_SWEEP_AGE # Grace period until the first tick
+    else:
+        sweep_ok = since_sweep <= HEALTH_MAX_SWEEP_AGE
+    workers = None
+    if SWEEP_WORKERS and storage is not None:
+        workers = len(storage.live_workers(WORKER_TIMEOUT)) # In worker mode nothing is swept without them
+        sweep_ok = sweep_ok and workers > 0
+    details = {
+        'status': 'ok' if connected and sweep_ok else 'unhealthy',
+        'gateway_connected': connected,
+        'gateway_latency_seconds': latency if math.isfinite(latency) else None,
+        'seconds_since_last_sweep': since_sweep,
+        'max_sweep_age_seconds': HEALTH_MAX_SWEEP_AGE,
+        'event_loop_lag_seconds': loop_lag.last,
+        'live_workers': workers,
+    }
+    return connected and sweep_ok, details
+
+
+def prometheus_metrics():
+    """Current counters in Prometheus text format for /metrics."""
+    spotify_stats = spotify.stats() if spotify else {}
+    retry_stats = spotify_retry_policy.stats()
+    cache_stats = artist_cache.stats()
+    response_cache_stats = spotify.response_cache.stats() if spotify and spotify.response_cache else {}
+    latency = bot.latency
+    worker_metrics = []
+    if SWEEP_WORKERS and storage is not None:
+        worker_metrics = [
+            ("spotify_bot_live_workers", "gauge", "Sweep workers with a recent heartbeat.",
+             len(storage.live_workers(WORKER_TIMEOUT))),
+            ("spotify_bot_release_queue_depth", "gauge", "Releases queued by workers, not yet picked up.",
+             storage.queued_release_count()),
+        ]
+    return render_prometheus(worker_metrics + [
+        ("spotify_bot_sweeps_total", "counter", "Release loop ticks completed.", sweep_stats.sweeps),
+        ("spotify_bot_sweep_duration_seconds_total", "counter", "Time spent checking artists.", sweep_stats.duration_seconds),
+        ("spotify_bot_last_sweep_duration_seconds", "gauge", "Duration of the last sweep that checked artists.", sweep_stats.last_duration),
+        ("spotify_bot_last_sweep_timestamp_seconds", "gauge", "Unix time the release loop last completed a tick.", sweep_stats.last_success),
+        ("spotify_bot_artists_checked_total", "counter", "Artist checks completed.", sweep_stats.artists_checked),
+        ("spotify_bot_artist_check_failures_total", "counter", "Artist checks that raised.", sweep_stats.artists_failed),
+        ("spotify_bot_tracked_artists", "gauge", "Artists tracked across all channels.", len(artists_to_track_set)),
+        ("spotify_bot_burst_runs_total", "counter", "Release-feed bursts run.", burst_stats['runs']),
+        ("spotify_bot_burst_requests_total", "counter", "Feed pages requested by bursts.", burst_stats['pages']),
+        ("spotify_bot_burst_announced_total", "counter", "Releases announced from the feeds before the sweep found them.",
+         burst_stats['announced']),
+        ("spotify_bot_spotify_requests_total", "counter", "Spotify Web API requests made.", spotify_stats.get('requests', 0)),
+        ("spotify_bot_spotify_not_modified_total", "counter", "Album requests answered 304 Not Modified.", spotify_stats.get('not_modified', 0)),
+        ("spotify_bot_spotify_rate_limited_total", "counter", "Spotify 429 responses.", retry_stats['throttled']),
+        ("spotify_bot_spotify_server_errors_total", "counter", "Spotify 5xx responses and connection errors.", retry_stats['server_errors']),
+        ("spotify_bot_cache_hits_total", "counter", "Cache lookups that hit.",
+         [({'cache': 'artist'}, cache_stats['hits']), ({'cache': 'response'}, response_cache_stats.get('hits', 0))]),
+        ("spotify_bot_cache_misses_total", "counter", "Cache lookups that missed.",
+         [({'cache': 'artist'}, cache_stats['misses']), ({'cache': 'response'}, response_cache_stats.get('misses', 0))]),
+        ("spotify_bot_announcements_sent_total", "counter", "Releases posted to channels.", dispatcher.announcements_sent),
+        ("spotify_bot_announcement_messages_total", "counter", "Discord messages sent by the announcer.", dispatcher.messages_sent),
+        ("spotify_bot_announcement_retries_total", "counter", "Failed sends queued again for a retry.", dispatcher.retries),
+        ("spotify_bot_announcement_failures_total", "counter", "Releases that could not be posted.", dispatcher.failures),
+        ("spotify_bot_announcements_pending", "gauge", "Releases queued for posting.", dispatcher.pending()),
+        ("spotify_bot_event_loop_lag_seconds", "gauge", "Latest event-loop lag sample.", loop_lag.last),
+        ("spotify_bot_event_loop_lag_max_seconds", "gauge", "Worst event-loop lag since start.", loop_lag.max),
+        ("spotify_bot_event_loop_lag_histogram_seconds", "histogram", "Event-loop lag samples.", loop_lag.histogram),
+        ("spotify_bot_sweep_phase_seconds", "histogram", "Release sweep phase durations (per artist for fetch/dedup/announce).",
+         sweep_timings.samples('phase')),
+        ("spotify_bot_command_seconds", "histogram", "Command handling time.", command_timings.samples('command')),
+        ("spotify_bot_gateway_latency_seconds", "gauge", "Discord gateway heartbeat latency.",
+         latency if math.isfinite(latency) else None),
+    ])
+
+
+def release_announcements(release, artist_uri, artist_name):
+    """(channel_id, release, artist_name, artist_uri) for every channel following any tracked artist credited on it."""
+    channel_ids = set(channel_subscriptions.get(artist_uri, ()))
+    for credited in release.get('artists') or []:
+        channel_ids.update(channel_subscriptions.get(credited.get('uri'), ()))
+    return [(channel_id, release, artist_name, artist_uri) for channel_id in channel_ids]
+
+
+def announce_release(release, artist_uri, artist_name):
+    """Stores a release in the outbox for every following channel, then queues it for posting."""
+    announcements = release_announcements(release, artist_uri, artist_name)
+    storage.queue_announcements(announcements)
+    for announcement in announcements:
+        dispatcher.enqueue(*announcement)
+
+
+async def consume_release_queue():
+    """Worker mode: announces releases the sweep workers queued, deduplicating across workers."""
+    sweep_stats.idle()
+    claimed = storage.queued_releases()
+    if not claimed:
+        return
+    # Workers own the high-water marks; refresh ours (for !listartists) for the artists that released
+    artist_states.update(storage.load_artist_states({artist_uri for _, _, artist_uri, _ in claimed}))
+    now = time.time()
+    still_listed_ids = []
+    announcements = []
+    for _, release, artist_uri, artist_name in claimed:
+        release_id = release['id']
+        # A collaboration can be queued by the workers of two different artists
+        if release_id in announced_release_ids:
+            if announced_release_ids.touch(release_id, now):
+                still_listed_ids.append(release_id)
+            continue
+        log.info("release.found artist=%r release=%r id=%s", artist_name, release.get('name'), release_id)
+        announced_release_ids.add(release_id)
+        announcements.extend(release_announcements(release, artist_uri, artist_name))
+    # Queue rows only go once their announcements are in the outbox, which keeps them until they're posted
+    storage.dequeue_releases([queue_id for queue_id, _, _, _ in claimed], announcements)
+    for announcement in announcements:
+        dispatcher.enqueue(*announcement)
+    storage.touch_announced(still_listed_ids, now)
+    log.info("queue.consumed claimed=%d announcements=%d", len(claimed), len(announcements))
+
+
+async def run_release_burst():
+    """Announces releases by tracked artists straight from Spotify's new-release feeds.
+
+    A few dozen feed requests cover every tracked artist at once. Releases are claimed in the
+    announced set and the outbox (which sweep workers check too), not recorded as known, so the
+    per-artist sweep later finds them, sees they're announced and just catches up its high-water
+    mark (it stays the reconciliation pass).
+    """
+    spotify = get_spotify()
+    if spotify is None:
+        return
+    with sweep_timings.time("burst"):
+        result = await scan_release_feeds(spotify, artists_to_track_set)
+    matches = [(album, artist_uris) for album, artist_uris in result['matches'] if album['id'] not in announced_release_ids]
+    # Already in an artist's baseline (e.g. released just before the artist was added): not news.
+    # One batched query, run off the event loop
+    known_ids = await asyncio.to_thread(storage.known_release_ids_among, [album['id'] for album, _ in matches])
+    announced = 0
+    for album, artist_uris in matches:
+        release_id = album['id']
+        if release_id in known_ids or release_id in announced_release_ids:
+            continue
+        artist_uri = artist_uris[0]
+        artist_name = next((a.get('name') for a in album.get('artists') or [] if a.get('uri') == artist_uri), None)
+        log.info("release.found source=burst artist=%r release=%r id=%s", artist_name, album.get('name'), release_id)
+        announced_release_ids.add(release_id)
+        announce_release(album, artist_uri, artist_name or artist_display_name(artist_uri))
+        announced += 1
+    burst_stats['runs'] += 1
+    burst_stats['pages'] += result['pages']
+    burst_stats['albums'] += result['albums']
+    burst_stats['announced'] += announced
+    log.info("burst.finished pages=%d albums=%d tracked_matches=%d announced=%d", result['pages'], result['albums'],
+             len(result['matches']), announced)
+
+
+async def check_new_releases(artist_uris=None):
+    """Checks Spotify for new releases from the given artists (default: those the scheduler says are due)."""
     global announced_release_ids
     global artists_to_track_set
-    if sp is None: # Don't run if Spotify connection failed
-        print("❌ Spotify connection unavailable, skipping release check.")
-        return
-
-    print("Checking for new releases...")
-    channel = bot.get_channel(NOTIFICATION_CHANNEL_ID)
-    if not channel:
-        print(f"❌ Error: Could not find channel with ID {NOTIFICATION_CHANNEL_ID}. Make sure the ID is correct and the bot is in the server.")
+    spotify = get_spotify() # Built on the first sweep if nothing needed it earlier
+    if spotify is None: # Don't run without a Spotify client
+        log.error("sweep.skipped reason=no_spotify_client")
         return
 
-    # Convert set to list for iteration to avoid issues if set changes mid-loop
-    current_artists_to_track = list(artists_to_track_set)
+    # Snapshot the list to avoid issues if the tracked set changes mid-sweep
+    current_artists_to_track = scheduler.pop_due() if artist_uris is None else list(artist_uris)
     if not current_artists_to_track:
-        print("No artists currently being tracked.")
-        return
+        sweep_stats.idle()
+        return # Nothing due this tick
+    log.info("sweep.start artists=%d", len(current_artists_to_track))
 
-    for artist_uri in current_artists_to_track:
-        artist_id = artist_uri.split(':')[-1] # Get ID from URI
+    try:
+        # Resolve all display names up front: cached names are free, misses cost 1 request per 50 artists
         try:
-            # Get latest 5 albums and singles
-            results = sp.artist_albums(artist_id, album_type='album,single', limit=5, country='US')
-            artist_info = sp.artist(artist_id)
-            artist_name = artist_info.get('name', f'Unknown Artist ({artist_id})')
-
-            if results and results['items']:
-                for item in results['items']:
-                    release_id = item['id']
-                    release_name = item['name']
-                    release_type = item['album_type']
-                    release_url = item['external_urls']['spotify']
-                    # release_date = item.get('release_date', 'N/A') # Optional: Release date can be inconsistent
-
-                    # Check if already announced
-                    if release_id not in announced_release_ids:
-                        print(f"✅ Found potential new release: {artist_name} - {release_name}")
-                        message = (
-                            f"🚨 **New {release_type.capitalize()} Release!** 🚨\n\n"
-                            f"**Artist:** {artist_name}\n"
-                            f"**Title:** {release_name}\n"
-                            # f"**Released:** {release_date}\n" # Optional
-                            f"🔗 Listen here: {release_url}"
-                        )
-                        try:
-                            await channel.send(message)
-                            announced_release_ids.add(release_id)
-                            print(f"   Sent notification to channel {NOTIFICATION_CHANNEL_ID}.")
-                            await asyncio.sleep(1) # Small delay between messages to avoid Discord rate limits
-                        except discord.errors.Forbidden:
-                            print(f"   ❌ Error: Bot lacks permissions to send messages in channel {NOTIFICATION_CHANNEL_ID}.")
-                            # Stop trying for this channel if permissions are wrong
-                            break
-                        except Exception as send_e:
-                            print(f"   ❌ Error sending message: {send_e}")
-
-            # Short delay between checking each artist to avoid Spotify rate limits
-            await asyncio.sleep(0.5)
-
-        except spotipy.exceptions.SpotifyException as se:
-            print(f"   ❌ Spotify API Error checking artist {artist_uri}: Status {se.http_status}, Reason: {se.msg}")
-            # Consider specific handling for 429 (rate limit) or 404 (not found)
-            await asyncio.sleep(10) # Wait longer on API errors
+            with sweep_timings.time("resolve_names"):
+                artist_infos = await spotify.artists_by_uri(current_artists_to_track)
         except Exception as e:
-            print(f"   ❌ General Error checking artist {artist_uri}: {type(e).__name__} - {e}")
-            await asyncio.sleep(5)
-
-    print("Finished checking releases cycle.")
-
-
-@tasks.loop(hours=1) # Checks once per hour
+            log.warning("sweep.resolve_names_failed error=%s: %s", type(e).__name__, e)
+            artist_infos = {}
+        # Backfill names for artists that were stored without one (e.g. imported from the old JSON file)
+        named = [(uri, info['name']) for uri, info in artist_infos.items()
+                 if info and info.get('name') and uri in artist_index and artist_index.get(uri) != info['name']]
+        if named:
+            storage.add_artists(named)
+            for uri, name in named:
+                artist_index.set(uri, name)
+
+        sweep_started = time.time()
+        still_listed_ids = [] # Already-announced releases whose last-seen time should be persisted
+
+        async def check_artist(artist_uri):
+            """Checks one artist and announces anything new. Runs concurrently with other artists."""
+            artist_id = artist_uri.split(':')[-1] # Get ID from URI
+            # Pages only as far as needed; unchanged artists cost one request and no further work
+            try:
+                with sweep_timings.time("fetch"):
+                    new_items, seen_ids, state, pages = await scan_artist(
+                        spotify, artist_id, artist_states.get(artist_uri),
+                        lambda: storage.load_known_release_ids(artist_uri))
+            except Exception:
+                scheduler.reschedule(artist_uri, (artist_states.get(artist_uri) or {}).get('latest_release_date'))
+                raise
+            # Active artists come back sooner, dormant ones later
+            scheduler.reschedule(artist_uri, state['latest_release_date'], found_new=bool(new_items))
+            if artist_uri not in artists_to_track_set:
+                return # Removed while it was being checked; saving now would bring its state rows back
+            if not seen_ids and state == artist_states.get(artist_uri):
+                return # First page unchanged: nothing to store, so no database write for this artist
+            artist_info = artist_infos.get(artist_uri) or {}
+            artist_name = artist_info.get('name') or artist_display_name(artist_uri) # Stored name if the lookup failed
+
+            log.debug("sweep.artist uri=%s pages=%d new=%d seen=%d", artist_uri, pages, len(new_items), len(seen_ids))
+
+            to_announce = []
+            with sweep_timings.time("dedup"):
+                for item in new_items:
+                    release_id = item['id']
+                    # Check if already announced (e.g. a collaboration already posted for another artist)
+                    if release_id in announced_release_ids:
+                        if announced_release_ids.touch(release_id, sweep_started):
+                            still_listed_ids.append(release_id)
+                        continue
+                    log.info("release.found artist=%r release=%r id=%s", artist_name, item['name'], release_id)
+                    # Claimed now so other artists' checks skip it; failed sends are retried from the outbox
+                    announced_release_ids.add(release_id)
+                    to_announce.append(item)
+
+                # The high-water mark and the announcements are stored together, so a restart before
+                # the posts go out resends them from the outbox instead of losing them
+                announcements = [announcement for item in to_announce
+                                 for announcement in release_announcements(item, artist_uri, artist_name)]
+                storage.record_scan(artist_uri, seen_ids, state, sweep_started, announcements)
+                artist_states[artist_uri] = state
+            if not announcements:
+                return
+            with sweep_timings.time("announce"):
+                for announcement in announcements:
+                    dispatcher.enqueue(*announcement)
+
+        # Check many artists at once; wall time is bounded by the rate limiter, not by per-artist sleeps
+        summary = await run_sweep(current_artists_to_track, check_artist)
+    finally:
+        if artist_uris is None:
+            # Artists the sweep never reached (cancelled or failed mid-way) would otherwise stay unscheduled
+            scheduler.requeue(current_artists_to_track)
+    sweep_stats.record(summary['checked'], summary['failed'], summary['duration'])
+    sweep_timings.observe("sweep", summary['duration'])
+    log.info("sweep.finished checked=%d failed=%d duration=%.1fs", summary['checked'], summary['failed'], summary['duration'])
+
+    storage.touch_announced(still_listed_ids, sweep_started) # Eviction (evict_stale_releases) goes by these
+
+    retry_stats = spotify_retry_policy.stats()
+    if retry_stats['throttled'] or retry_stats['server_errors']:
+        log.warning("spotify.retries throttled=%d paused=%.1fs server_errors=%d gave_up=%d", retry_stats['throttled'],
+                    retry_stats['throttle_seconds'], retry_stats['server_errors'], retry_stats['gave_up'])
+    if log.isEnabledFor(logging.DEBUG): # Stats are only gathered when someone will read them
+        schedule_stats = scheduler.stats()
+        cache_stats = artist_cache.stats()
+        log.debug("sweep.stats scheduled=%d next_due_in=%s artist_cache_hits=%d artist_cache_misses=%d cached=%d",
+                  schedule_stats['scheduled'], schedule_stats['next_due_in'], cache_stats['hits'], cache_stats['misses'],
+                  cache_stats['size'])
+        if spotify.response_cache is not None:
+            response_stats = spotify.stats()
+            log.debug("spotify.albums not_modified=%d modified=%d shared_cache_hit_rate=%.2f", response_stats['not_modified'],
+                      response_stats['modified'], spotify.response_cache.stats()['hit_rate'])
+
+
+def evict_stale_releases(now):
+    """Forgets releases that haven't been returned by Spotify for a whole dedup window (at most hourly)."""
+    global last_eviction
+    if now - last_eviction < 60 * 60:
+        return
+    last_eviction = now
+    cutoff = now - RELEASE_DEDUP_WINDOW_DAYS * 24 * 60 * 60
+    # Sweeps only touch releases they come across again; keep everything an artist still lists too
+    for release_id in storage.refresh_known_announced(cutoff, now):
+        announced_release_ids.touch(release_id, now)
+    evicted = announced_release_ids.evict_older_than(cutoff)
+    storage.prune_announced(cutoff)
+    dedup_stats = announced_release_ids.stats()
+    log.info("dedup.pruned releases=%d kib=%.1f bytes_per_release=%.1f evicted=%d", dedup_stats['releases'],
+             dedup_stats['memory_bytes'] / 1024, dedup_stats['bytes_per_release'], evicted)
+
+
+@tasks.loop(minutes=1) # Each tick checks only the artists whose next-check time has passed
 async def background_check_loop():
-    """Runs the check_new_releases function periodically."""
-    await check_new_releases()
+    """Runs check_new_releases for due artists (in worker mode: announces what the workers queued)."""
+    first_sweep = "first_sweep" not in startup_timer.durations
+    if first_sweep:
+        startup_timer.start("first_sweep")
+    # tasks.loop only survives connection errors; anything else (e.g. a locked database) would stop it for good
+    try:
+        if SWEEP_WORKERS:
+            await consume_release_queue() # The sweep itself runs in the worker processes
+        else:
+            await check_new_releases()
+        evict_stale_releases(time.time()) # Here, not in check_new_releases: worker mode never calls that
+    except Exception:
+        log.exception("loop.tick_failed")
+        return
+    if first_sweep:
+        startup_timer.end("first_sweep")
+        startup_timer.report_when_complete()
+
+@tasks.loop(minutes=BURST_INTERVAL_MINUTES)
+async def release_burst_loop():
+    """Release-day fast path: scans the new-release feeds (by default only inside the weekly release window)."""
+    if BURST_MODE == "always" or in_release_window(time.time()):
+        try:
+            await run_release_burst()
+        except Exception: # As in background_check_loop: an uncaught error would stop bursts for good
+            log.exception("burst.tick_failed")
+
+@release_burst_loop.before_loop
+async def before_release_burst_loop():
+    await bot.wait_until_ready()
 
 @background_check_loop.before_loop
 async def before_background_check_loop():
-    """Waits until the bot is ready before starting the loop."""
-    print("Background task: Waiting for bot to be ready...")
+    """Waits until the bot is ready, then checks the Spotify credentials before the first sweep."""
+    log.info("loop.waiting_for_ready")
     await bot.wait_until_ready()
-    print("Background task: Bot ready, starting loop.")
+    # A failure is only logged: the loop still starts, and each sweep retries with fresh requests
+    await check_spotify_connection()
+    log.info("loop.started")
 
 # --- Discord Events ---
 
+@bot.before_invoke
+async def start_command_timer(ctx):
+    """Notes when a command started, for the per-command latency histograms."""
+    ctx.started_at = time.perf_counter()
+
+@bot.after_invoke
+async def record_command_timing(ctx):
+    """Records how long the command took (also runs when it raised)."""
+    elapsed = time.perf_counter() - ctx.started_at
+    command_timings.observe(ctx.command.name, elapsed)
+    log.debug("command.done name=%s channel=%s duration=%.3fs", ctx.command.name, ctx.channel.id, elapsed)
+
+@bot.event
+async def setup_hook():
+    """Runs once on the bot's loop before connecting: starts the loop-lag probe and the health server."""
+    global health_server
+    loop_lag.start()
+    try:
+        health_server = await start_server(health_status, prometheus_metrics)
+    except OSError as e:
+        log.error("health_server.failed error=%s", e) # e.g. port in use; the bot itself keeps running
+
 @bot.event
 async def on_ready():
     """Runs when the bot successfully connects to Discord."""
-    print(f'✅ Logged in as {bot.user.name} ({bot.user.id})')
-    print('------')
+    log.info("gateway.ready user=%s id=%s guilds=%d", bot.user.name, bot.user.id, len(bot.guilds))
+    startup_timer.end("gateway")
+    dispatcher.start()
     if not background_check_loop.is_running():
-        print("Starting background release check loop...")
         try:
+            if SWEEP_WORKERS:
+                background_check_loop.change_interval(seconds=RELEASE_QUEUE_POLL_SECONDS)
             background_check_loop.start()
         except Exception as e:
-            print(f"❌ Failed to start background loop: {e}")
+            log.error("loop.start_failed error=%s", e)
+    if BURST_MODE != "off" and not release_burst_loop.is_running():
+        release_burst_loop.start()
 
 # --- Discord Commands ---
 
-@bot.command(name='addartists', help='Adds one or more Spotify artist links/URIs to the tracking list.\nExample: !addartists <link1> <URI2> ...')
+@bot.command(name='addartists', help='Adds one or more Spotify artist links/URIs to this channel\'s tracking list.\nExample: !addartists <link1> <URI2> ...')
 async def add_artists(ctx, *, artist_links: str):
-    """Adds one or more Spotify artist links to the tracking list."""
+    """Adds one or more Spotify artist links to the tracking list of the channel the command was used in."""
     global artists_to_track_set
-    print(f"--- Command !addartists started. Initial type: {type(artists_to_track_set)} ---") # DEBUG
-    if sp is None:
+    spotify = get_spotify()
+    if spotify is None:
         await ctx.send("❌ Cannot add artists, Spotify connection is not available.")
         return
 
     # Check and potentially fix the type at the start
     if not isinstance(artists_to_track_set, set):
-        print(f"⚠️ WARNING: artists_to_track_set was type {type(artists_to_track_set)}, expected set. Resetting.")
+        log.warning("addartists.bad_state type=%s", type(artists_to_track_set).__name__)
         await ctx.send("⚠️ Internal warning: Artist tracking list had unexpected type, resetting. Please try again.")
         artists_to_track_set = set()
 
     added_artists_names = []
     failed_artists_input = []
-    already_tracked_count = 0
-
-    spotify_link_pattern = re.compile(r'(?:https?://open\.spotify\.com/artist/|spotify:artist:)([a-zA-Z0-9]{22})')
-    matches = spotify_link_pattern.finditer(artist_links)
-    found_links_count = 0
 
-    for match in matches:
-        found_links_count += 1
-        artist_id = match.group(1)
-        artist_uri = f"spotify:artist:{artist_id}"
-        original_input = match.group(0)
+    links = await extract_links(artist_links)
+    pending_uris = links['artists'] # artist_uri -> original input, deduped in message order
+    failed_artists_input.extend(f"`{link}` (Short link did not resolve to an artist)" for link in links['unresolved'])
 
-        # ---- MORE DEBUG PRINTS ----
-        print(f"Looping for: {artist_uri}")
-        print(f"  --> BEFORE sp.artist call, type is: {type(artists_to_track_set)}")
-        # -------------------------
-
-        if artist_uri not in artists_to_track_set:
-            try:
-                print(f"Attempting to verify artist URI: {artist_uri}")
-                artist_info = sp.artist(artist_uri)
-                artist_name = artist_info.get('name', f'ID:{artist_id}')
-
-                # ---- MORE DEBUG PRINTS ----
-                print(f"  --> AFTER sp.artist call, type is: {type(artists_to_track_set)}")
-                print(f"  --> Value is: {artists_to_track_set}") # Print the value too
-                # -------------------------
-
-                # Ensure it's still a set before adding
-                if isinstance(artists_to_track_set, set):
-                     artists_to_track_set.add(artist_uri) # <<< Line causing error
-                     added_artists_names.append(artist_name)
-                     print(f"✅ Successfully added artist: {artist_name} ({artist_uri})")
-                else:
-                    print(f"ERROR: artists_to_track_set became {type(artists_to_track_set)} mid-command!")
-                    failed_artists_input.append(f"`{original_input}` (Internal Type Error)")
-
-            except spotipy.exceptions.SpotifyException as se:
-                error_details = f"Spotify API Error (Status: {se.http_status}, Code: {se.code}, Reason: {se.msg})"
-                failed_artists_input.append(f"`{original_input}` ({error_details})")
-                print(f"❌ Failed to verify/add {artist_uri} - {error_details}")
-            except Exception as e:
-                error_type = type(e).__name__
-                failed_artists_input.append(f"`{original_input}` (Error Type: {error_type})")
-                print(f"❌ Failed to verify/add {artist_uri} - An unexpected error occurred: {error_type} - {e}")
-                print("Full Traceback:")
-                traceback.print_exc()
-
-        else:
-            already_tracked_count += 1
-            print(f"ℹ️ Artist already tracked: {artist_uri}")
-
-        await asyncio.sleep(0.1)
+    channel_id = ctx.channel.id
+    guild_id = ctx.guild.id if ctx.guild else None
+    already_tracked_count = 0
+    if pending_uris:
+        try:
+            log.debug("addartists.verify artists=%d", len(pending_uris))
+            result = await verify_and_subscribe(channel_id, guild_id, pending_uris)
+            already_tracked_count = result['already']
+            added_artists_names = result['added']
+            failed_artists_input.extend(f"`{pending_uris[uri]}` (Artist not found)" for uri in result['failed'])
+            # Only the URIs of a lookup batch that errored are reported; the other batches went through
+            failed_artists_input.extend(f"`{pending_uris[uri]}` ({describe_lookup_error(error)})"
+                                        for uri, error in result['errors'].items())
+            log.info("addartists.added channel=%s added=%d already=%d not_found=%d errors=%d", channel_id,
+                     len(result['added']), result['already'], len(result['failed']), len(result['errors']))
+        except Exception as e:
+            error_type = type(e).__name__
+            failed_artists_input.extend(f"`{original_input}` (Error Type: {error_type})" for original_input in pending_uris.values())
+            log.exception("addartists.verify_failed artists=%d error=%s", len(pending_uris), error_type)
 
     # --- Feedback Message ---
-    # (Rest of the feedback message code remains the same)
-    if found_links_count == 0:
+    if not pending_uris and not links['unresolved']:
         await ctx.send("❌ No valid Spotify artist links or URIs found in your message. Use the format `https://open.spotify.com/playlist/5LA0xQetL5h7RXKjwBol031...` or `spotify:artist:ID...`")
         return
 
@@ -233,7 +722,7 @@ async def add_artists(ctx, *, artist_links: str):
         response_message += "\n\n"
 
     if already_tracked_count > 0:
-        response_message += f"ℹ️ **{already_tracked_count}** provided artist(s) were already being tracked.\n\n"
+        response_message += f"ℹ️ **{already_tracked_count}** provided artist(s) were already being tracked in this channel.\n\n"
 
     if failed_artists_input:
         response_message += f"⚠️ Failed to add or verify **{len(failed_artists_input)}** artist link(s)/URI(s):\n- "
@@ -244,110 +733,87 @@ async def add_artists(ctx, *, artist_links: str):
         response_message = response_message[:1950] + "... (message too long)"
     await ctx.send(response_message.strip())
 
-@bot.command(name='listartists', help='Shows the list of artists currently being tracked.')
-async def list_artists(ctx):
-    """Lists the artists currently being tracked."""
-    global artists_to_track_set
-    if sp is None:
-        await ctx.send("❌ Cannot list artists, Spotify connection is not available.")
+@bot.command(name='listartists', help='Shows the artists tracked in this channel, with page buttons.\nSearch by name and/or filter by recent releases.\nExamples: !listartists   !listartists taylor   !listartists --days 30')
+async def list_artists(ctx, *, query: str = ""):
+    """Lists this channel's artists from locally stored names (no Spotify calls)."""
+    channel_artists = channel_artist_uris(ctx.channel.id)
+    if not channel_artists:
+        await ctx.send("ℹ️ No artists are currently being tracked in this channel. Use `!addartists <link>` to add some.")
         return
 
-    if not artists_to_track_set:
-        await ctx.send("ℹ️ No artists are currently being tracked. Use `!addartists <link>` to add some.")
-        return
-
-    artist_names = []
-    failed_lookups = 0
-    # Send feedback that it might take a moment
-    initial_message = await ctx.send(f"⏳ Fetching names for {len(artists_to_track_set)} tracked artists...")
-
-    for uri in artists_to_track_set:
-        try:
-            artist_info = sp.artist(uri)
-            artist_names.append(artist_info.get('name', f'Unknown Artist ({uri})'))
-        except Exception as e:
-            print(f"Error looking up artist name for {uri}: {e}")
-            failed_lookups += 1
-            artist_names.append(f"Error looking up (`{uri.split(':')[-1]}`)")
-        await asyncio.sleep(0.1) # Small delay to avoid hitting rate limits
-
-    response_message = f"🎶 **Currently tracking {len(artists_to_track_set)} artist(s):**\n\n- "
-    response_message += "\n- ".join(sorted(artist_names, key=str.lower)) # Sort alphabetically
-
-    if failed_lookups > 0:
-        response_message += f"\n\n⚠️ Could not retrieve names for {failed_lookups} tracked URIs (they might be invalid or there was an API error)."
-
-    # Edit the initial message or send a new one if too long
-    if len(response_message) > 1950:
-        response_message = response_message[:1950] + "... (list too long)"
-        await initial_message.edit(content=response_message)
-    else:
+    # "--days N" keeps artists whose latest release is at most N days old
+    days_match = re.search(r'--days\s+(\d+)', query)
+    predicate = None
+    if days_match:
         try:
-            await initial_message.edit(content=response_message)
-        except discord.errors.NotFound: # Handle if the original message was deleted
-            await ctx.send(response_message)
-        except Exception as e:
-            print(f"Error editing message for listartists: {e}")
-            await ctx.send(response_message) # Send as new on other errors
-
+            since = (datetime.date.today() - datetime.timedelta(days=int(days_match.group(1)))).isoformat()
+        except OverflowError: # Reaches back before year 1: every release qualifies
+            since = ""
+        def predicate(uri):
+            latest = (artist_states.get(uri) or {}).get('latest_release_date')
+            return bool(latest) and latest >= since
+        query = query[:days_match.start()] + query[days_match.end():]
+    query = query.strip()
+
+    matches = artist_index.search(query, uris=channel_artists, predicate=predicate)
+    if not matches:
+        await ctx.send("ℹ️ No tracked artists in this channel match that search.")
+        return
 
-@bot.command(name='removeartists', help='Removes one or more Spotify artist links/URIs from the tracking list.\nExample: !removeartists <link1> <URI2> ...')
+    lines = []
+    for uri in matches:
+        line = f"[{artist_display_name(uri)}](https://open.spotify.com/artist/{uri.split(':')[-1]})"
+        latest = (artist_states.get(uri) or {}).get('latest_release_date')
+        if latest:
+            line += f" · latest release {latest}"
+        lines.append(line)
+
+    title = f"🎶 Tracking {len(channel_artists)} artist(s) in this channel"
+    if query or days_match:
+        filters = [f'"{query}"'] if query else []
+        if days_match:
+            filters.append(f"released in the last {days_match.group(1)} days")
+        title = f"🔎 {len(matches)} of {len(channel_artists)} artist(s): {', '.join(filters)}"
+    view = ArtistListView(ctx.author.id, title, lines)
+    view.message = await ctx.send(embed=view.embed(), view=view if view.pages > 1 else None)
+
+
+@bot.command(name='removeartists', help='Removes one or more Spotify artist links/URIs from this channel\'s tracking list.\nExample: !removeartists <link1> <URI2> ...')
 async def remove_artists(ctx, *, artist_links: str):
-    """Removes one or more Spotify artist links/URIs from the tracking list."""
+    """Removes one or more Spotify artist links/URIs from the tracking list of this channel."""
     global artists_to_track_set
     if not isinstance(artists_to_track_set, set): # Safety check
-        print(f"⚠️ WARNING in removeartists: artists_to_track_set was type {type(artists_to_track_set)}. Resetting.")
+        log.warning("removeartists.bad_state type=%s", type(artists_to_track_set).__name__)
         artists_to_track_set = set()
         await ctx.send("⚠️ Internal warning: Artist list had wrong type. Resetting list.")
         return
 
-    removed_count = 0
-    not_found_count = 0
-    uris_to_remove = set()
-    removed_names = [] # Store names for feedback
-    original_input_map = {} # Map URI back to original input for error messages
-
-    # Regex to find Spotify artist URLs or URIs
-    spotify_link_pattern = re.compile(r'(?:https?://open\.spotify\.com/artist/|spotify:artist:)([a-zA-Z0-9]{22})')
-
-    matches = spotify_link_pattern.finditer(artist_links)
-    found_links_count = 0
-
-    for match in matches:
-        found_links_count += 1
-        artist_id = match.group(1)
-        artist_uri = f"spotify:artist:{artist_id}"
-        uris_to_remove.add(artist_uri)
-        original_input_map[artist_uri] = match.group(0) # Store original input
+    links = await extract_links(artist_links)
+    original_input_map = links['artists'] # artist_uri -> original input (for error messages), deduped in message order
+    unresolved_note = ""
+    if links['unresolved']:
+        unresolved_note = f"\n⚠️ Short link(s) did not resolve to an artist: {', '.join(f'`{link}`' for link in links['unresolved'])}"
 
-    if found_links_count == 0:
-        await ctx.send("❌ No valid Spotify artist links or URIs found in your message.")
+    if not original_input_map:
+        await ctx.send(f"❌ No valid Spotify artist links or URIs found in your message.{unresolved_note}"[:1950])
         return
 
     removed_uris = []
     failed_to_find_inputs = [] # Store original inputs of those not found
-    # Check which ones are actually in the set before removing
-    for uri in uris_to_remove:
-        if uri in artists_to_track_set:
+    # Check which ones this channel actually follows before removing
+    subscribed_here = channel_artist_uris(ctx.channel.id)
+    for uri, original_input in original_input_map.items():
+        if uri in subscribed_here:
             removed_uris.append(uri)
-            artists_to_track_set.remove(uri) # Remove it
         else:
-            failed_to_find_inputs.append(f"`{original_input_map.get(uri, uri)}`")
+            failed_to_find_inputs.append(f"`{original_input}`")
+    # Names are known locally for every followed artist; read them before unsubscribing drops them
+    removed_names = [artist_display_name(uri) for uri in removed_uris]
+    unsubscribe_channel(ctx.channel.id, removed_uris) # Write-through; drops artists no channel follows
 
     removed_count = len(removed_uris)
     not_found_count = len(failed_to_find_inputs)
 
-    # Try to get names for removed artists (optional, adds API calls)
-    if sp and removed_uris:
-        for uri in removed_uris:
-             try:
-                 artist_info = sp.artist(uri)
-                 removed_names.append(artist_info.get('name', f'`{uri.split(":")[-1]}`'))
-                 await asyncio.sleep(0.1) # Avoid rate limit
-             except Exception:
-                 removed_names.append(f"Error getting name (`{uri.split(':')[-1]}`)")
-
-
     response_message = ""
     if removed_count > 0:
         names_str = ", ".join(removed_names) if removed_names else f"{removed_count} artist(s)"
@@ -356,32 +822,196 @@ async def remove_artists(ctx, *, artist_links: str):
         response_message += f"ℹ️ **{not_found_count}** provided artist(s) were not found in the tracking list: {', '.join(failed_to_find_inputs)}\n"
     if removed_count == 0 and not_found_count > 0 :
          response_message = "❌ None of the provided artists were found in the tracking list."
-    elif removed_count == 0 and not_found_count == 0: # Should not happen if found_links_count > 0
+    elif removed_count == 0 and not_found_count == 0: # Should not happen if any links were found
         response_message = "No artists were removed."
-
-    # Optional: Save the updated artists_to_track_set to a file here for persistence
+    response_message += unresolved_note
 
     if len(response_message) > 1950:
         response_message = response_message[:1950] + "... (message too long)"
     await ctx.send(response_message.strip())
 
 
+# --- Bulk Import / Export ---
+
+MAX_IMPORT_FILE_BYTES = 2 * 1024 * 1024 # Plenty for tens of thousands of URIs
+
+
+@bot.command(name='importartists', help='Bulk-adds artists to this channel from a playlist link and/or attached .txt/.csv/.json files.\nExample: !importartists https://open.spotify.com/playlist/<ID>  (or attach an !exportartists file)')
+async def import_artists(ctx, *, source: str = ""):
+    """Adds every artist from playlists (all pages) and attached files, verified in batches of 50."""
+    spotify = get_spotify()
+    if spotify is None:
+        await ctx.send("❌ Cannot import artists, Spotify connection is not available.")
+        return
+
+    links = await extract_links(source)
+    artist_uris = list(links['artists'])
+    problems = [f"`{link}` did not resolve to an artist or playlist" for link in links['unresolved']]
+
+    for playlist_id in links['playlists']:
+        try:
+            artist_uris.extend(await spotify.playlist_artist_uris(playlist_id))
+        except spotipy.exceptions.SpotifyException as se:
+            problems.append(f"Playlist `{playlist_id}`: Spotify API Error (Status: {se.http_status})")
+            log.warning("importartists.playlist_failed playlist=%s status=%s", playlist_id, se.http_status)
+
+    # Text, CSV and JSON (including our own exports) all carry artist links/URIs, so one pattern reads them all
+    for attachment in ctx.message.attachments:
+        if attachment.size > MAX_IMPORT_FILE_BYTES:
+            problems.append(f"`{attachment.filename}` is larger than {MAX_IMPORT_FILE_BYTES // (1024 * 1024)} MB")
+            continue
+        try:
+            text = (await attachment.read()).decode('utf-8', errors='replace')
+        except discord.HTTPException as e:
+            problems.append(f"Could not download `{attachment.filename}` ({e})")
+            continue
+        artist_uris.extend(parse_artist_links(text)) # Files are parsed locally only; short links aren't followed
+
+    if not artist_uris:
+        message = "❌ No Spotify artists found. Provide a playlist link or attach a .txt/.csv/.json file with artist links/URIs."
+        if problems:
+            message += "\n- " + "\n- ".join(problems)
+        await ctx.send(message)
+        return
+
+    status_message = await ctx.send(f"⏳ Importing {len(set(artist_uris))} unique artist(s)...")
+    try:
+        result = await verify_and_subscribe(ctx.channel.id, ctx.guild.id if ctx.guild else None, artist_uris)
+    except spotipy.exceptions.SpotifyException as se:
+        await status_message.edit(content=f"❌ Spotify API Error while verifying artists (Status: {se.http_status}). Nothing was imported.")
+        return
+    except Exception as e:
+        # Anything else (e.g. a database error) must still replace the "Importing..." message
+        log.exception("importartists.failed channel=%s artists=%d error=%s", ctx.channel.id, len(artist_uris),
+                      type(e).__name__)
+        await status_message.edit(content=f"❌ Import failed ({type(e).__name__}). Please try again.")
+        return
+
+    response_message = f"✅ Imported **{len(result['added'])}** artist(s)"
+    if result['added']:
+        preview = ", ".join(result['added'][:20])
+        more = f" and {len(result['added']) - 20} more" if len(result['added']) > 20 else ""
+        response_message += f": {preview}{more}"
+    response_message += ".\n"
+    if result['already']:
+        response_message += f"ℹ️ **{result['already']}** were already being tracked in this channel.\n"
+    if result['failed']:
+        response_message += f"⚠️ **{len(result['failed'])}** could not be found on Spotify.\n"
+    if result['errors']:
+        response_message += (f"⚠️ **{len(result['errors'])}** could not be verified "
+                             f"({describe_lookup_error(next(iter(result['errors'].values())))}); run the import again to retry them.\n")
+    if problems:
+        response_message += "⚠️ " + "\n⚠️ ".join(problems) + "\n"
+    if len(response_message) > 1950:
+        response_message = response_message[:1950] + "... (message too long)"
+    await status_message.edit(content=response_message.strip())
+
+
+@bot.command(name='exportartists', help='Sends this channel\'s tracked artists as a file (json, csv or txt).\nExample: !exportartists csv')
+async def export_artists(ctx, file_format: str = "json"):
+    """Exports this channel's tracked artists using locally stored names (no Spotify calls)."""
+    file_format = file_format.lower().lstrip('.')
+    if file_format not in ('json', 'csv', 'txt'):
+        await ctx.send("❌ Unknown format. Use `json`, `csv` or `txt`.")
+        return
+
+    channel_artists = sorted(channel_artist_uris(ctx.channel.id), key=lambda uri: artist_display_name(uri).lower())
+    if not channel_artists:
+        await ctx.send("ℹ️ No artists are currently being tracked in this channel.")
+        return
+
+    buffer = io.StringIO()
+    if file_format == 'json':
+        json.dump({
+            'channel_id': ctx.channel.id,
+            'exported_at': int(time.time()),
+            'artists': [{'uri': uri, 'name': artist_display_name(uri)} for uri in channel_artists],
+        }, buffer, indent=2, ensure_ascii=False)
+    elif file_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(['uri', 'name', 'url'])
+        for uri in channel_artists:
+            writer.writerow([uri, artist_display_name(uri), f"https://open.spotify.com/artist/{uri.split(':')[-1]}"])
+    else:
+        buffer.writelines(f"{uri}\n" for uri in channel_artists)
+
+    data = io.BytesIO(buffer.getvalue().encode('utf-8'))
+    await ctx.send(f"📦 {len(channel_artists)} tracked artist(s). Re-import with `!importartists` and this file attached.",
+                   file=discord.File(data, filename=f"tracked_artists.{file_format}"))
+
+
+def format_seconds(seconds):
+    """Short human duration for !botstats: '12 ms', '3.4 s', '5.0 min'."""
+    if seconds is None:
+        return "n/a"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    if seconds < 120:
+        return f"{seconds:.1f} s"
+    return f"{seconds / 60:.1f} min"
+
+
+def format_timings(timings):
+    """One line per histogram: sample count and p50/p95/max."""
+    lines = [f"`{name}` n={t['count']} · p50 {format_seconds(t['p50'])} · p95 {format_seconds(t['p95'])} · "
+             f"max {format_seconds(t['max'])}" for name, t in timings.summary().items()]
+    return "\n".join(lines) or "No samples yet."
+
+
+@bot.command(name='botstats', help='Shows event-loop lag, sweep and command timings, and Spotify/announcement counters.')
+async def bot_stats(ctx):
+    """Summarizes the bot's instrumentation (the same numbers /metrics exposes)."""
+    lag = loop_lag.stats()
+    latency = bot.latency
+    since_sweep = sweep_stats.seconds_since_success()
+    spotify_stats = spotify.stats() if spotify else {}
+    retry_stats = spotify_retry_policy.stats()
+    cache_stats = artist_cache.stats()
+
+    embed = discord.Embed(title="📊 Bot stats", color=0x1DB954)
+    embed.add_field(name="Event loop", inline=False, value=(
+        f"Lag now {format_seconds(lag['last'])} · p95 {format_seconds(lag['p95'])} · max {format_seconds(lag['max'])}\n"
+        f"Gateway latency {format_seconds(latency if math.isfinite(latency) else None)} · "
+        f"up {format_seconds(startup_timer.total())}"))
+    embed.add_field(name="Sweep", inline=False, value=(
+        f"{len(artists_to_track_set)} artist(s) tracked · {sweep_stats.sweeps} tick(s) · "
+        f"{sweep_stats.artists_checked} checked ({sweep_stats.artists_failed} failed)\n"
+        f"Last sweep took {format_seconds(sweep_stats.last_duration)}, last tick "
+        f"{format_seconds(since_sweep) + ' ago' if since_sweep is not None else 'not yet'}"))
+    embed.add_field(name="Sweep phases", value=format_timings(sweep_timings), inline=False)
+    embed.add_field(name="Commands", value=format_timings(command_timings), inline=False)
+    embed.add_field(name="Spotify", inline=False, value=(
+        f"{spotify_stats.get('requests', 0)} request(s) · {retry_stats['throttled']} rate-limited (429) · "
+        f"{retry_stats['server_errors']} server error(s)\n"
+        f"Artist cache hit rate {cache_stats['hit_rate']:.0%} · {spotify_stats.get('not_modified', 0)} album page(s) not modified"))
+    embed.add_field(name="Announcements", inline=False, value=(
+        f"{dispatcher.announcements_sent} sent in {dispatcher.messages_sent} message(s) · "
+        f"{dispatcher.failures} failed · {dispatcher.pending()} queued"))
+    await ctx.send(embed=embed)
+
+
 # --- Function to Start the Bot ---
 def run_bot():
     """Validates required variables and starts the bot."""
     print("--- Inside run_bot function ---")
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)-7s %(name)s: %(message)s")
     if DISCORD_TOKEN is None:
         print("❌ CRITICAL: DISCORD_TOKEN environment variable not set. Bot cannot start.")
         return # Stop here if no token
-    if sp is None:
-        print("❌ CRITICAL: Spotify connection failed during initialization. Bot cannot start.")
-        return # Stop here if Spotify failed
+    if not (SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET):
+        print("❌ CRITICAL: SPOTIPY_CLIENT_ID / SPOTIPY_CLIENT_SECRET not set. Bot cannot start.")
+        return # Stop here without Spotify credentials
+
+    startup_timer.start("state")
+    load_state()
+    startup_timer.end("state")
 
     print(f"Attempting bot.run() with token ending in ...{DISCORD_TOKEN[-6:]}")
 
     try:
         # This is the line that connects to Discord and runs the bot
-        bot.run(DISCORD_TOKEN)
+        startup_timer.start("gateway") # Login until on_ready; Spotify is only contacted after this
+        bot.run(DISCORD_TOKEN, log_handler=None) # discord.py logs through the root config above
 
     # Specific check for login failure (wrong token)
     except discord.errors.LoginFailure:
@@ -416,51 +1046,3 @@ def run_bot():
 
 # Note: The code to actually *run* the bot is in main.py
 # This file defines the bot and its functions.
-
-# --- Persistence Functions (Optional: Uncomment to enable saving/loading artists) ---
-# import json
-# ARTIST_FILE = 'tracked_artists.json' # Store file in the root directory
-
-# def load_artists_from_file():
-#     """Loads artist URIs from a JSON file."""
-#     default_set = set() # Start empty if file doesn't exist
-#     try:
-#         with open(ARTIST_FILE, 'r') as f:
-#             # Load list from file and convert to set
-#             artist_list = json.load(f)
-#             if isinstance(artist_list, list):
-#                 # Validate that items look like Spotify URIs
-#                 valid_uris = {uri for uri in artist_list if isinstance(uri, str) and uri.startswith("spotify:artist:")}
-#                 print(f"Loaded {len(valid_uris)} valid artist URIs from '{ARTIST_FILE}'.")
-#                 return valid_uris
-#             else:
-#                 print(f"⚠️ Warning: '{ARTIST_FILE}' does not contain a valid list. Starting empty.")
-#                 return default_set
-#     except FileNotFoundError:
-#         print(f"'{ARTIST_FILE}' not found. Starting with empty/initial artist list.")
-#         return artists_to_track_set # Return the initial set defined above if file not found
-#     except json.JSONDecodeError:
-#         print(f"❌ Error decoding JSON from '{ARTIST_FILE}'. Starting empty.")
-#         return default_set
-#     except Exception as e:
-#         print(f"❌ Error loading artists from file: {e}")
-#         return default_set
-
-# def save_artists_to_file(artist_set):
-#     """Saves artist URIs to a JSON file."""
-#     # Ensure Render has write access - requires a Persistent Disk attached to the service.
-#     # Free tier does NOT typically support persistent file storage easily.
-#     # Consider using Render's built-in database or Redis for persistence on free/paid tiers instead.
-#     try:
-#         # Convert set to list before saving to JSON
-#         with open(ARTIST_FILE, 'w') as f:
-#             json.dump(list(artist_set), f, indent=4)
-#         print(f"Saved {len(artist_set)} artists to '{ARTIST_FILE}'")
-#     except Exception as e:
-#         print(f"❌ Error saving artists to file '{ARTIST_FILE}': {e}. (Does Render service have write permissions/disk?)")
-
-# --- Load artists at startup if using persistence ---
-# You would uncomment these lines AND the functions above to enable persistence.
-# print("Attempting to load tracked artists from file...")
-# artists_to_track_set = load_artists_from_file()
-# --------------------------------------------------
@@ -1,31 +1,43 @@
-from flask import Flask
-from threading import Thread
+import json
+import logging
 import os
 
-app = Flask('')
-
-@app.route('/')
-def home():
-  # This endpoint needs to return a 200 OK status for UptimeRobot
-  return "Bot is alive!"
-
-def run():
-  # Get port from environment variable Render provides, default to 8080 for local
-  port = int(os.environ.get('PORT', 8080))
-  # Host 0.0.0.0 is crucial for Render to reach the server inside the container
-  print(f"--- Flask server attempting to run on host 0.0.0.0 port {port} ---") # DEBUG PRINT
-  try:
-    # Set use_reloader=False if you encounter issues with threads
-    app.run(host='0.0.0.0', port=port) #, use_reloader=False)
-    print("--- Flask server finished running (shouldn't happen unless stopped) ---") # DEBUG PRINT
-  except Exception as e:
-    print(f"!!! ERROR starting Flask server: {e}") # DEBUG PRINT
-
-def keep_alive():
+from aiohttp import web
+
+# --- Settings ---
+# Port Render provides; 8080 for local runs. Host 0.0.0.0 is crucial for Render to reach the server inside the container
+HEALTH_PORT = int(os.environ.get('PORT', 8080))
+HEALTH_HOST = os.environ.get('HEALTH_HOST', '0.0.0.0')
+
+log = logging.getLogger(__name__)
+
+
+async def start_server(health, metrics, host=HEALTH_HOST, port=HEALTH_PORT):
   '''
-  Creates and starts a new thread that runs the Flask server.
+  Starts the keep-alive / health / metrics web server on the running event loop (discord.py's).
+
+  `health()` returns (healthy, details dict) and `metrics()` returns Prometheus text; both run on the
+  loop, so they must be cheap and non-blocking. Returns the AppRunner (call `cleanup()` to stop).
   '''
-  print("--- keep_alive function called, starting server thread ---") # DEBUG PRINT
-  t = Thread(target=run)
-  t.start()
-  print("--- Server thread started ---") # DEBUG PRINT
+  async def home(request):
+    # This endpoint needs to return a 200 OK status for UptimeRobot
+    return web.Response(text="Bot is alive!")
+
+  async def healthz(request):
+    healthy, details = health()
+    return web.Response(text=json.dumps(details), status=200 if healthy else 503, content_type='application/json')
+
+  async def prometheus(request):
+    return web.Response(text=metrics(), content_type='text/plain', charset='utf-8',
+                        headers={'Cache-Control': 'no-store'})
+
+  app = web.Application()
+  app.router.add_get('/', home)
+  app.router.add_get('/healthz', healthz)
+  app.router.add_get('/metrics', prometheus)
+  runner = web.AppRunner(app, access_log=None) # UptimeRobot/Prometheus polls would flood the logs
+  await runner.setup()
+  site = web.TCPSite(runner, host, port)
+  await site.start()
+  log.info("health_server.listening host=%s port=%d paths=/,/healthz,/metrics", host, port)
+  return runner
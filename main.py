@@ -1,14 +1,14 @@
 print("--- main.py execution started ---") # DEBUG PRINT
 import os
 print("os imported.") # DEBUG PRINT
+from startup_timing import startup_timer # Lightweight; times the imports below
+startup_timer.start("imports")
 bot = None # Initialize bot to None
-keep_alive = None # Initialize keep_alive to None
 
 try:
-    from keep_alive import keep_alive
-    print("keep_alive imported successfully.") # DEBUG PRINT
     import bot # Assuming your main bot logic is in bot.py
     print("bot imported successfully.") # DEBUG PRINT
+    startup_timer.end("imports")
 except ImportError as e:
     print(f"!!! IMPORT ERROR: {e}") # DEBUG PRINT - Crucial to see if files are found
     # Optional: Exit if essential imports fail
@@ -18,16 +18,43 @@ except Exception as e:
     print(f"!!! UNEXPECTED ERROR during import: {e}") # DEBUG PRINT
 
 # Check if imports were successful before proceeding
-if keep_alive is None:
-    print("!!! keep_alive function was not imported. Cannot start web server.")
 if bot is None:
     print("!!! bot module was not imported. Cannot start Discord bot.")
 
-if keep_alive and bot: # Only proceed if both imports worked
-    print("Attempting to call keep_alive()...") # DEBUG PRINT
-    keep_alive()
-    print("keep_alive() called. Background server thread should be starting.") # DEBUG PRINT
+if bot: # Only proceed if the import worked
+    # Worker mode: the release sweep runs in SWEEP_WORKERS separate processes (see worker.py)
+    if bot.SWEEP_WORKERS > 0:
+        import atexit
+        import signal
+        import subprocess
+        import sys
+        worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+        # Workers watch this PID and exit if we die without stopping them (e.g. SIGKILL)
+        worker_env = dict(os.environ, SWEEP_WORKER_PARENT_PID=str(os.getpid()))
+        workers = [subprocess.Popen([sys.executable, worker_script, str(index)], env=worker_env)
+                   for index in range(1, bot.SWEEP_WORKERS + 1)]
 
+        def stop_workers():
+            for w in workers:
+                if w.poll() is None:
+                    w.terminate() # SIGTERM lets each worker deregister
+            for w in workers:
+                try:
+                    w.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    w.kill()
+
+        def on_sigterm(signum, frame):
+            # atexit doesn't run on SIGTERM (e.g. a redeploy), so stop the workers here, then exit
+            stop_workers()
+            sys.exit(0)
+
+        atexit.register(stop_workers)
+        signal.signal(signal.SIGTERM, on_sigterm)
+        print(f"Started {len(workers)} sweep worker process(es).") # DEBUG PRINT
+
+    # The keep-alive / health / metrics server (keep_alive.py) runs on the bot's own event loop,
+    # started from bot.setup_hook, so there is no separate server thread to launch here.
     print("Attempting to call bot.run_bot()...") # DEBUG PRINT
     try:
         bot.run_bot() # Calls the function from bot.py to start the bot
@@ -35,6 +62,6 @@ if keep_alive and bot: # Only proceed if both imports worked
         print(f"!!! ERROR DURING bot.run_bot() CALL: {e}") # DEBUG PRINT
 
 else:
-    print("!!! Skipping keep_alive() and bot.run_bot() due to import errors.")
+    print("!!! Skipping bot.run_bot() due to import errors.")
 
 print("--- main.py reached end (this should ideally not happen if bot runs forever) ---") # DEBUG PRINT
@@ -0,0 +1,193 @@
+import asyncio
+import bisect
+import contextlib
+import os
+import time
+
+# --- Settings ---
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", 0.5)) # Seconds between event-loop lag probes
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus style) with count, sum and max."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (the max if it's in the +Inf bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        """count / mean / p50 / p95 / max in seconds."""
+        return {
+            'count': self.count,
+            'mean': (self.sum / self.count) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max,
+        }
+
+
+class Timings:
+    """Named latency histograms, e.g. one per command or per sweep phase."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self.histograms = {}
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self._buckets)
+        histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def time(self, name):
+        """Context manager that observes the time spent inside the block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def samples(self, label):
+        """[(labels, Histogram)] for render_prometheus, labelled by name."""
+        return [({label: name}, histogram) for name, histogram in sorted(self.histograms.items())]
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag: how late a short sleep wakes up compared to when it was due.
+
+    Anything that blocks the loop (sync I/O, heavy CPU work) shows up here as lag, and while it
+    lasts the bot can't answer commands or heartbeat the gateway.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last = 0.0 # Most recent lag sample (seconds)
+        self.max = 0.0 # Worst lag seen since start
+        self.samples = 0
+        self.histogram = Histogram(LAG_BUCKETS)
+        self._task = None
+
+    def start(self):
+        """Starts the probe task on the running loop (no-op if it's already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - due))
+
+    def record(self, lag):
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.samples += 1
+        self.histogram.observe(lag)
+
+    def stats(self):
+        """Returns the latest, 95th percentile and worst lag in seconds."""
+        return {'last': self.last, 'p95': self.histogram.quantile(0.95), 'max': self.max, 'samples': self.samples}
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _sample_line(name, labels, value):
+    label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+    return f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}"
+
+
+def render_prometheus(metrics):
+    """Formats (name, type, help, value) tuples in the Prometheus text exposition format.
+
+    `value` may be a number, a Histogram, or a list of (labels dict, number or Histogram) pairs.
+    """
+    lines = []
+    for name, metric_type, help_text, value in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        samples = value if isinstance(value, list) else [({}, value)]
+        for labels, sample in samples:
+            if isinstance(sample, Histogram):
+                cumulative = 0
+                for bound, count in zip(sample.buckets + ("+Inf",), sample.counts):
+                    cumulative += count
+                    lines.append(_sample_line(f"{name}_bucket", dict(labels, le=bound), cumulative))
+                lines.append(_sample_line(f"{name}_sum", labels, sample.sum))
+                lines.append(_sample_line(f"{name}_count", labels, sample.count))
+            else:
+                lines.append(_sample_line(name, labels, sample))
+    return "\n".join(lines) + "\n"
+
+
+class SweepStats:
+    """Running totals for the release sweep, read by /healthz, /metrics and the logs."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self.sweeps = 0 # Completed loop ticks (including ticks where nothing was due)
+        self.artists_checked = 0
+        self.artists_failed = 0
+        self.duration_seconds = 0.0 # Total time spent sweeping
+        self.last_duration = 0.0
+        self.last_success = None # When the last tick finished without raising
+
+    def record(self, checked, failed, duration):
+        """Records one finished tick that checked artists."""
+        self.sweeps += 1
+        self.artists_checked += checked
+        self.artists_failed += failed
+        self.duration_seconds += duration
+        self.last_duration = duration
+        self.last_success = self._clock()
+
+    def idle(self):
+        """Records a tick where no artist was due (the loop is still alive)."""
+        self.sweeps += 1
+        self.last_success = self._clock()
+
+    def seconds_since_success(self):
+        """Seconds since the last successful tick, or None if there hasn't been one."""
+        return None if self.last_success is None else self._clock() - self.last_success
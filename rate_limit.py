@@ -0,0 +1,41 @@
+import asyncio
+import os
+import time
+
+# --- Settings ---
+# Spotify doesn't publish exact limits (it's a rolling ~30 s window per app), so stay well under it
+SPOTIFY_REQUESTS_PER_SECOND = float(os.environ.get("SPOTIFY_REQUESTS_PER_SECOND", 5))
+SPOTIFY_BURST = int(os.environ.get("SPOTIFY_BURST", 10))
+
+
+class TokenBucket:
+    """Async token-bucket limiter: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate=SPOTIFY_REQUESTS_PER_SECOND, capacity=SPOTIFY_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = None # Created lazily so the bucket can be built outside a running loop
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        """Waits until `tokens` are available, then takes them. Callers are served in FIFO order."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                wait = (tokens - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= tokens
+            self.acquired += tokens
@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+import logging
+import os
+
+from release_scan import RELEASE_GROUPS, RELEASE_MARKET, normalize_release_date
+
+# --- Settings ---
+# "window": only during the weekly release window (see scheduler.py), "always", or "off"
+BURST_MODE = os.environ.get("BURST_MODE", "window").lower()
+BURST_INTERVAL_MINUTES = float(os.environ.get("BURST_INTERVAL_MINUTES", 10))
+# Pages per feed; Spotify search stops at offset 1000, i.e. 20 pages of 50
+BURST_MAX_PAGES = int(os.environ.get("BURST_MAX_PAGES", 20))
+# Releases older than this are left to the per-artist sweep (it knows what was already baselined)
+BURST_MAX_AGE_DAYS = int(os.environ.get("BURST_MAX_AGE_DAYS", 2))
+FEED_PAGE_SIZE = 50 # Max page size for both feeds
+SEARCH_OFFSET_LIMIT = 1000
+
+log = logging.getLogger(__name__)
+
+
+async def fetch_feed(spotify, source, max_pages=BURST_MAX_PAGES, market=RELEASE_MARKET):
+    """Returns (albums, pages fetched) from one feed: "search" (tag:new) or "new_releases".
+
+    The first page gives the total; the remaining pages are fetched concurrently.
+    """
+    async def fetch_page(offset):
+        if source == "search":
+            page = await spotify.search_albums("tag:new", market=market, limit=FEED_PAGE_SIZE, offset=offset)
+        else:
+            page = await spotify.new_releases(country=market, limit=FEED_PAGE_SIZE, offset=offset)
+        return (page or {}).get('albums') or {}
+
+    first_page = await fetch_page(0)
+    total = min(first_page.get('total') or 0, max_pages * FEED_PAGE_SIZE, SEARCH_OFFSET_LIMIT)
+    pages = [first_page] + list(await asyncio.gather(
+        *(fetch_page(offset) for offset in range(FEED_PAGE_SIZE, total, FEED_PAGE_SIZE))))
+    albums = [album for page in pages for album in page.get('items') or [] if album]
+    return albums, len(pages)
+
+
+def match_tracked(albums, tracked_uris, since):
+    """Yields (album, [tracked artist URIs credited on it]) for albums released on or after `since`.
+
+    Only the release types the per-artist sweep announces count (the feeds also carry compilations).
+    `tracked_uris` is a set, so each album costs one hash lookup per credited artist.
+    """
+    seen = set()
+    for album in albums:
+        if album['id'] in seen or normalize_release_date(album.get('release_date')) < since:
+            continue
+        if (album.get('album_group') or album.get('album_type')) not in RELEASE_GROUPS:
+            continue
+        seen.add(album['id'])
+        matched = [artist['uri'] for artist in album.get('artists') or [] if artist.get('uri') in tracked_uris]
+        if matched:
+            yield album, matched
+
+
+async def scan_release_feeds(spotify, tracked_uris, sources=("search", "new_releases")):
+    """Pages the global new-release feeds and returns releases by tracked artists.
+
+    Returns {'matches': [(album, [artist URIs])], 'albums': count scanned, 'pages': requests made}.
+    A source that fails (e.g. an endpoint not available to this app) is logged and skipped.
+    """
+    since = (datetime.date.today() - datetime.timedelta(days=BURST_MAX_AGE_DAYS)).isoformat()
+    albums = []
+    pages = 0
+    results = await asyncio.gather(*(fetch_feed(spotify, source) for source in sources), return_exceptions=True)
+    for source, result in zip(sources, results):
+        if isinstance(result, Exception):
+            log.warning("burst.feed_failed source=%s error=%s: %s", source, type(result).__name__, result)
+            continue
+        albums.extend(result[0])
+        pages += result[1]
+    return {'matches': list(match_tracked(albums, tracked_uris, since)), 'albums': len(albums), 'pages': pages}
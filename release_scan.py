@@ -0,0 +1,114 @@
+import datetime
+import hashlib
+import logging
+import os
+
+# --- Settings ---
+ALBUMS_PAGE_SIZE = 50 # Max page size for the artist albums endpoint; one request either way
+MAX_PAGES_PER_ARTIST = int(os.environ.get("MAX_PAGES_PER_ARTIST", 10))
+# On an artist's first check, only releases this recent are announced (the rest become the baseline)
+NEW_ARTIST_LOOKBACK_DAYS = int(os.environ.get("NEW_ARTIST_LOOKBACK_DAYS", 7))
+RELEASE_MARKET = os.environ.get("RELEASE_MARKET", "US")
+# Release types that are announced (compilations and appears_on are not)
+RELEASE_GROUPS = ('album', 'single')
+
+log = logging.getLogger(__name__)
+
+
+def normalize_release_date(release_date):
+    """Pads Spotify's year / year-month precision dates to YYYY-MM-DD so they compare as strings."""
+    if not release_date:
+        return "0000-01-01"
+    parts = release_date.split('-')
+    while len(parts) < 3:
+        parts.append("01")
+    return '-'.join(parts[:3])
+
+
+def page_signature(page):
+    """Short digest of a results page: its total plus the IDs on it, in order."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(page.get('total')).encode())
+    for item in page.get('items') or []:
+        digest.update(item['id'].encode())
+    return digest.hexdigest()
+
+
+async def scan_artist(spotify, artist_id, state, load_known_ids):
+    """Fetches only as much of an artist's discography as needed to find new releases.
+
+    `state` is the artist's stored high-water mark ({'total', 'latest_release_date', 'signature',
+    'resume_offset'}), or None on the first check. `load_known_ids()` returns the release IDs already seen for the
+    artist; it's only called when the first page has changed.
+
+    Returns (new_items, seen_ids, new_state, pages_fetched):
+    - new_items: releases to announce (empty when the first page is unchanged)
+    - seen_ids: release IDs seen for the first time, to add to the artist's known IDs
+    """
+    async def fetch_page(offset):
+        page = await spotify.artist_albums(artist_id, include_groups=','.join(RELEASE_GROUPS), limit=ALBUMS_PAGE_SIZE,
+                                           offset=offset, country=RELEASE_MARKET)
+        return page or {'items': [], 'total': 0}
+
+    first_page = await fetch_page(0)
+    signature = page_signature(first_page)
+    total = first_page.get('total') or 0
+    pages = 1
+
+    if state and state.get('signature') == signature:
+        return [], [], state, pages # Nothing changed since last sweep
+
+    known_ids = load_known_ids() if state else set()
+    recent = (datetime.date.today() - datetime.timedelta(days=NEW_ARTIST_LOOKBACK_DAYS)).isoformat()
+    if state:
+        # Every release Spotify added since last time shows up as an increase in `total`
+        expected_new = max(1, total - (state.get('total') or 0))
+        announce_from = "0000-01-01"
+    else:
+        # First check: page through everything to build the baseline, announcing only recent releases
+        expected_new = total
+        announce_from = recent
+    # A scan that stopped at the page cap continues where it left off (after page 0, which may have
+    # new releases); what it finds there is backlog, so like a baseline only recent releases are news
+    resume_offset = (state.get('resume_offset') or 0) if state else 0
+
+    new_items = []
+    seen_ids = []
+    latest = state.get('latest_release_date') if state else None
+    page = first_page
+    offset = 0
+    complete = True
+    while True:
+        since = recent if resume_offset and offset >= resume_offset else announce_from
+        for item in page.get('items') or []:
+            if item['id'] in known_ids:
+                continue
+            known_ids.add(item['id'])
+            seen_ids.append(item['id'])
+            release_date = normalize_release_date(item.get('release_date'))
+            if latest is None or release_date > latest:
+                latest = release_date
+            if release_date >= since:
+                new_items.append(item)
+        # Results are grouped by album type, so a burst of singles can sit behind a page of albums:
+        # keep paging until every newly counted item has been found.
+        if len(seen_ids) >= expected_new or not page.get('next'):
+            break
+        if pages >= MAX_PAGES_PER_ARTIST:
+            log.warning("scan.page_cap artist=%s found=%d expected=%d pages=%d resume_offset=%d (continuing next sweep)",
+                        artist_id, len(seen_ids), expected_new, pages, offset + ALBUMS_PAGE_SIZE)
+            complete = False
+            break
+        offset = max(offset + ALBUMS_PAGE_SIZE, resume_offset)
+        page = await fetch_page(offset)
+        pages += 1
+
+    if complete:
+        new_state = {'total': total, 'latest_release_date': latest, 'signature': signature, 'resume_offset': None}
+    else:
+        # Only count what was found, drop the signature and remember the next page, so the next
+        # sweep picks up from there; an artist with a long backlog finishes in a few sweeps
+        previous_total = (state.get('total') or 0) if state else 0
+        new_state = {'total': previous_total + len(seen_ids), 'latest_release_date': latest, 'signature': None,
+                     'resume_offset': offset + ALBUMS_PAGE_SIZE}
+    return new_items, seen_ids, new_state, pages
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import random
+import time
+
+import requests
+import spotipy
+
+# --- Settings ---
+SPOTIFY_MAX_ATTEMPTS = int(os.environ.get("SPOTIFY_MAX_ATTEMPTS", 5))
+SPOTIFY_BACKOFF_BASE = float(os.environ.get("SPOTIFY_BACKOFF_BASE", 0.5)) # Seconds, doubled per attempt
+SPOTIFY_BACKOFF_MAX = float(os.environ.get("SPOTIFY_BACKOFF_MAX", 30))
+# Used when a 429 arrives without a usable Retry-After header
+DEFAULT_RETRY_AFTER = float(os.environ.get("SPOTIFY_DEFAULT_RETRY_AFTER", 5))
+
+
+def retry_after_seconds(error):
+    """Reads Retry-After (seconds) from a SpotifyException, falling back to DEFAULT_RETRY_AFTER."""
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return max(0.0, float(headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class RetryPolicy:
+    """Decides whether a failed Spotify call is retried and how long to wait first.
+
+    - 429: every caller pauses together until Retry-After has passed (the whole app is throttled).
+    - 5xx / connection errors: only the failing caller backs off, with jittered exponential delay.
+    - Anything else (400, 404, ...): raised immediately.
+    """
+
+    def __init__(self, max_attempts=SPOTIFY_MAX_ATTEMPTS, base_delay=SPOTIFY_BACKOFF_BASE,
+                 max_delay=SPOTIFY_BACKOFF_MAX, clock=time.monotonic):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._paused_until = 0.0
+        # Counters
+        self.throttled = 0 # 429 responses
+        self.throttle_seconds = 0.0 # Total time all callers were paused for 429s
+        self.server_errors = 0 # 5xx / connection failures
+        self.retries = 0
+        self.gave_up = 0
+
+    def pause_all(self, seconds):
+        """Holds every caller until `seconds` from now (extends, never shortens, an existing pause)."""
+        now = self._clock()
+        until = now + seconds
+        if until > self._paused_until:
+            self.throttle_seconds += until - max(now, self._paused_until)
+            self._paused_until = until
+
+    def paused_for(self):
+        """Seconds left in the current global pause (0 if not throttled)."""
+        return max(0.0, self._paused_until - self._clock())
+
+    async def wait_until_clear(self):
+        """Sleeps while the account is throttled; re-checks because the pause can be extended."""
+        while (remaining := self.paused_for()) > 0:
+            await asyncio.sleep(remaining)
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def retry_delay(self, error, attempt):
+        """Returns seconds to wait before retrying after `error`, or None to give up and re-raise.
+
+        For 429s the wait is applied globally via pause_all, so the returned delay is 0.
+        """
+        out_of_attempts = attempt + 1 >= self.max_attempts
+        if isinstance(error, spotipy.exceptions.SpotifyException) and error.http_status == 429:
+            self.throttled += 1
+            self.pause_all(retry_after_seconds(error)) # Hold everyone, even if this caller gives up
+            delay = 0.0
+        elif (isinstance(error, spotipy.exceptions.SpotifyException)
+              and error.http_status is not None and 500 <= error.http_status < 600):
+            self.server_errors += 1
+            delay = self.backoff_delay(attempt)
+        elif isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            self.server_errors += 1
+            delay = self.backoff_delay(attempt)
+        else:
+            return None # Not transient
+
+        if out_of_attempts:
+            self.gave_up += 1
+            return None
+        self.retries += 1
+        return delay
+
+    def stats(self):
+        """Returns the retry/throttle counters."""
+        return {
+            'throttled': self.throttled,
+            'throttle_seconds': self.throttle_seconds,
+            'server_errors': self.server_errors,
+            'retries': self.retries,
+            'gave_up': self.gave_up,
+            'paused_for': self.paused_for(),
+        }
@@ -0,0 +1,137 @@
+import datetime
+import heapq
+import os
+import random
+import time
+
+# --- Settings ---
+# How often each artist is checked, by how recently they last released something (minutes)
+HOT_INTERVAL = float(os.environ.get("POLL_HOT_MINUTES", 15)) * 60 # Released in the last 30 days
+WARM_INTERVAL = float(os.environ.get("POLL_WARM_MINUTES", 60)) * 60 # Last 6 months
+COOL_INTERVAL = float(os.environ.get("POLL_COOL_MINUTES", 6 * 60)) * 60 # Last 2 years
+DORMANT_INTERVAL = float(os.environ.get("POLL_DORMANT_MINUTES", 24 * 60)) * 60 # Anything older
+# New music goes live at 00:00 local time on Fridays, which sweeps across the globe from
+# ~10:00 UTC Thursday (UTC+14) to ~12:00 UTC Friday (UTC-12). Inside that window we poll faster.
+RELEASE_WINDOW_START = (3, 10) # (weekday, hour) in UTC: Thursday 10:00
+RELEASE_WINDOW_END = (4, 12) # Friday 12:00
+RELEASE_WINDOW_INTERVAL = float(os.environ.get("POLL_RELEASE_WINDOW_MINUTES", 15)) * 60
+JITTER = 0.1 # +/-10% so artists added together don't stay in lockstep
+
+
+def _week_seconds(weekday, hour):
+    return (weekday * 24 + hour) * 3600
+
+
+def in_release_window(timestamp):
+    """True if the Unix timestamp falls inside the weekly release window."""
+    moment = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    offset = _week_seconds(moment.weekday(), moment.hour) + moment.minute * 60 + moment.second
+    return _week_seconds(*RELEASE_WINDOW_START) <= offset < _week_seconds(*RELEASE_WINDOW_END)
+
+
+def next_release_window_start(timestamp):
+    """Unix timestamp of the next time the release window opens (after `timestamp`)."""
+    moment = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    week_start = (moment - datetime.timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = week_start + datetime.timedelta(seconds=_week_seconds(*RELEASE_WINDOW_START))
+    if start.timestamp() <= timestamp:
+        start += datetime.timedelta(days=7)
+    return start.timestamp()
+
+
+def activity_interval(latest_release_date, now):
+    """Base polling interval from how long ago the artist last released."""
+    if not latest_release_date:
+        return WARM_INTERVAL # Unknown yet: check reasonably soon
+    try:
+        released = datetime.datetime.strptime(latest_release_date, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return WARM_INTERVAL
+    age_days = (now - released.timestamp()) / 86400
+    if age_days <= 30:
+        return HOT_INTERVAL
+    if age_days <= 182:
+        return WARM_INTERVAL
+    if age_days <= 730:
+        return COOL_INTERVAL
+    return DORMANT_INTERVAL
+
+
+def next_check_time(latest_release_date, found_new, now):
+    """When an artist should next be checked, given its activity and the weekly release window."""
+    interval = HOT_INTERVAL if found_new else activity_interval(latest_release_date, now)
+    if in_release_window(now) and interval < DORMANT_INTERVAL:
+        interval = min(interval, RELEASE_WINDOW_INTERVAL)
+    interval *= random.uniform(1 - JITTER, 1 + JITTER)
+    when = now + interval
+    # Don't sleep through the start of the release window (dormant artists still get one check)
+    window_start = next_release_window_start(now)
+    if when > window_start:
+        when = window_start + random.uniform(0, RELEASE_WINDOW_INTERVAL)
+    return when
+
+
+class PollScheduler:
+    """Min-heap of (next_check_time, artist_uri) deciding which artists each tick should check."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._heap = []
+        self._next_check = {} # artist_uri -> scheduled time; heap entries that disagree are stale
+
+    def __len__(self):
+        return len(self._next_check)
+
+    def schedule(self, artist_uri, when):
+        """Sets (or moves) the artist's next check time."""
+        self._next_check[artist_uri] = when
+        heapq.heappush(self._heap, (when, artist_uri))
+
+    def add(self, artist_uri, when=None):
+        """Starts tracking an artist; by default it's due immediately."""
+        self.schedule(artist_uri, self._clock() if when is None else when)
+
+    def remove(self, artist_uri):
+        """Stops scheduling an artist (its heap entry is dropped lazily)."""
+        self._next_check.pop(artist_uri, None)
+
+    def reschedule(self, artist_uri, latest_release_date, found_new=False):
+        """Schedules the artist's next check after it was just checked."""
+        if artist_uri in self._next_check:
+            self.schedule(artist_uri, next_check_time(latest_release_date, found_new, self._clock()))
+
+    def pop_due(self, limit=None):
+        """Removes and returns artists whose check time has passed, most overdue first.
+
+        Popped artists stay tracked; callers must reschedule() them once checked, and requeue() the
+        batch when the sweep ends so any it never reached are not left unscheduled.
+        """
+        now = self._clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+            when, artist_uri = heapq.heappop(self._heap)
+            if self._next_check.get(artist_uri) != when:
+                continue # Stale entry (removed or rescheduled)
+            self._next_check[artist_uri] = float('inf') # In progress until rescheduled
+            due.append(artist_uri)
+        if len(self._heap) > 2 * len(self._next_check) + 64: # Drop accumulated stale entries
+            self._heap = [(when, uri) for uri, when in self._next_check.items() if when != float('inf')]
+            heapq.heapify(self._heap)
+        return due
+
+    def requeue(self, artist_uris):
+        """Makes popped artists that were never rescheduled due again (e.g. their sweep was cancelled)."""
+        now = self._clock()
+        for artist_uri in artist_uris:
+            if self._next_check.get(artist_uri) == float('inf'):
+                self.schedule(artist_uri, now)
+
+    def stats(self):
+        """Returns how many artists are scheduled and when the next check is due."""
+        now = self._clock()
+        upcoming = [when for when in self._next_check.values() if when != float('inf')]
+        return {
+            'scheduled': len(self._next_check),
+            'due_now': sum(1 for when in upcoming if when <= now),
+            'next_due_in': max(0.0, min(upcoming) - now) if upcoming else None,
+        }
@@ -0,0 +1,49 @@
+import bisect
+import hashlib
+import os
+
+# --- Settings ---
+# Points per worker on the ring; more points spread artists more evenly
+WORKER_VNODES = int(os.environ.get("WORKER_VNODES", 128))
+
+
+def ring_hash(key):
+    """Stable 64-bit hash (Python's hash() is salted per process, so it can't be shared between workers)."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring mapping artist URIs to worker IDs.
+
+    When a worker joins or leaves, only the artists on its arcs of the ring move (about 1/N of them);
+    everyone else keeps their worker, and with it their warm caches and schedule.
+    """
+
+    def __init__(self, nodes=(), vnodes=WORKER_VNODES):
+        self.vnodes = vnodes
+        self._points = [] # Sorted (hash, node)
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            bisect.insort(self._points, (ring_hash(f"{node}#{i}"), node))
+
+    def remove(self, node):
+        if node in self.nodes:
+            self.nodes.discard(node)
+            self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key):
+        """Returns the node owning key (the first point clockwise from its hash), or None if the ring is empty."""
+        if not self._points:
+            return None
+        i = bisect.bisect_right(self._points, (ring_hash(key), ''))
+        return self._points[i % len(self._points)][1]
@@ -0,0 +1,159 @@
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from spotipy.cache_handler import CacheHandler
+
+from storage import DB_BUSY_TIMEOUT
+
+# --- Settings ---
+# "memory", "redis://host:port/db", or a SQLite file path (shareable by replicas on the same disk)
+SPOTIFY_CACHE_URL = os.environ.get("SPOTIFY_CACHE_URL", "spotify_cache.sqlite3")
+
+
+class CacheBackend(abc.ABC):
+    """Key/value store with optional per-key TTL, shared by the token cache and the response cache.
+
+    Values are strings. Implementations must be safe to call from the Spotify worker threads.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Returns the stored string for key, or None if missing/expired."""
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl=None):
+        """Stores value under key, expiring after ttl seconds (never if None)."""
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """Removes key if present."""
+
+    def _count(self, value):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self):
+        """Returns hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': (self.hits / lookups) if lookups else 0.0}
+
+
+class MemoryCache(CacheBackend):
+    """In-process backend (nothing survives a restart); also the reference for other implementations."""
+
+    def __init__(self, clock=time.time):
+        super().__init__()
+        self._clock = clock
+        self._data = {} # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= self._clock():
+                del self._data[key]
+                entry = None
+            return self._count(entry[1] if entry else None)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (self._clock() + ttl if ttl is not None else None, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteCache(CacheBackend):
+    """Default backend: a small SQLite (WAL) file, so the cache survives restarts."""
+
+    PURGE_EVERY = 500 # Writes between deletions of expired rows
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Shared by the bot and every sweep worker; a lock timeout would fail the token or album lookup
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=DB_BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())).fetchone()
+        return self._count(row[0] if row else None)
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                              (key, value, expires_at))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self.conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        with self._lock:
+            self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisCache(CacheBackend):
+    """Backend for replicas on different hosts. Needs the optional `redis` package."""
+
+    def __init__(self, url):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SPOTIFY_CACHE_URL points at Redis but the 'redis' package isn't installed.") from e
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key):
+        return self._count(self.client.get(key))
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=max(1, int(ttl)) if ttl is not None else None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+def open_cache(url=SPOTIFY_CACHE_URL):
+    """Builds the cache backend described by url (see SPOTIFY_CACHE_URL)."""
+    if url == "memory":
+        return MemoryCache()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisCache(url)
+    return SQLiteCache(url)
+
+
+class SharedTokenCacheHandler(CacheHandler):
+    """spotipy token cache stored in a CacheBackend, so restarts and replicas reuse one access token."""
+
+    def __init__(self, backend, client_id):
+        self.backend = backend
+        self.key = f"spotify_token:{client_id}"
+
+    def get_cached_token(self):
+        value = self.backend.get(self.key)
+        return json.loads(value) if value else None
+
+    def save_token_to_cache(self, token_info):
+        # spotipy refreshes a minute before expiry; keep the entry until the token is actually dead
+        ttl = max(60, token_info.get('expires_at', 0) - time.time()) if token_info.get('expires_at') else None
+        self.backend.set(self.key, json.dumps(token_info), ttl=ttl)
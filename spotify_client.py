@@ -0,0 +1,223 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import spotipy
+
+# --- Settings ---
+# spotipy is a blocking (requests-based) client, so every call runs on this many worker threads
+SPOTIFY_MAX_WORKERS = int(os.environ.get("SPOTIFY_MAX_WORKERS", 8))
+# Spotify's "Get Several Artists" endpoint accepts at most 50 IDs per request
+ARTISTS_BATCH_SIZE = 50
+PLAYLIST_PAGE_SIZE = 100 # Max page size for playlist items
+# Cached album pages are revalidated with ETag/Last-Modified; this only bounds how long they're kept
+ALBUMS_CACHE_TTL = 7 * 24 * 60 * 60
+# spotipy has no public way to add request headers, so conditional requests go through these
+# internals (present since 2.x; see requirements.txt). Without them artist_albums is not cached.
+SPOTIPY_INTERNALS = ('_auth_headers', '_session', 'prefix', 'requests_timeout')
+
+log = logging.getLogger(__name__)
+
+
+def build_session(pool_size=SPOTIFY_MAX_WORKERS):
+    """Returns a requests session for spotipy with one pooled connection per worker thread.
+
+    It has no urllib3 retries: spotipy's default adapter sleeps inside the worker thread on 429s
+    and hides the real status, so retries are left to RetryPolicy instead.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    return session
+
+
+def artist_id_from_uri(artist_uri):
+    """Returns the bare 22-character ID from a spotify:artist: URI (IDs pass through)."""
+    return artist_uri.split(':')[-1]
+
+
+class AsyncSpotify:
+    """Awaitable front for a spotipy client that keeps HTTP calls off the event loop."""
+
+    def __init__(self, sp, max_workers=SPOTIFY_MAX_WORKERS, artist_cache=None, rate_limiter=None, retry_policy=None,
+                 response_cache=None):
+        self.sp = sp
+        self.response_cache = response_cache # Optional CacheBackend for conditional artist_albums requests
+        self.not_modified = 0 # 304s answered from response_cache
+        self.modified = 0 # Full responses fetched while response_cache is enabled
+        self._counter_lock = threading.Lock() # The two counters above are updated from worker threads
+        missing = [name for name in SPOTIPY_INTERNALS if not hasattr(sp, name)]
+        if response_cache is not None and missing:
+            log.warning("spotify.conditional_disabled missing=%s", ','.join(missing))
+            self.response_cache = None
+        self.artist_cache = artist_cache # Optional ArtistCache consulted by artists_by_uri
+        self.rate_limiter = rate_limiter # Optional TokenBucket every request waits on
+        self.retry_policy = retry_policy # Optional RetryPolicy for 429/5xx handling
+        self.requests_made = 0
+        # Bounded pool: at most max_workers Spotify requests are in flight at once
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spotify")
+
+    async def _call(self, func, *args, **kwargs):
+        """Runs a blocking spotipy method on the thread pool and awaits the result, retrying per policy."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            if policy is not None:
+                await policy.wait_until_clear() # Throttled accounts pause every caller together
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            self.requests_made += 1
+            try:
+                return await loop.run_in_executor(self._executor, call)
+            except Exception as e:
+                delay = policy.retry_delay(e, attempt) if policy is not None else None
+                if delay is None:
+                    raise
+            attempt += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def artist(self, artist_id):
+        """Fetches a single artist object (accepts an ID, URI or URL)."""
+        return await self._call(self.sp.artist, artist_id)
+
+    async def artists(self, artist_ids):
+        """Fetches many artists with one request per 50 IDs.
+
+        Returns a list aligned with artist_ids; unknown IDs come back as None.
+        """
+        artist_ids = [artist_id_from_uri(a) for a in artist_ids]
+        chunks = [artist_ids[i:i + ARTISTS_BATCH_SIZE] for i in range(0, len(artist_ids), ARTISTS_BATCH_SIZE)]
+        pages = await asyncio.gather(*(self._call(self.sp.artists, chunk) for chunk in chunks))
+        results = []
+        for page in pages:
+            results.extend((page or {}).get('artists') or [])
+        return results
+
+    async def artists_by_uri(self, artist_uris):
+        """Resolves artist URIs to artist objects in batches: {uri: artist dict or None}.
+
+        Cached artists are served locally; only misses are fetched (and then cached).
+        """
+        artist_uris = list(dict.fromkeys(artist_uris)) # Drop repeats, keep order
+        cache = self.artist_cache
+        resolved = {}
+        missing = []
+        for uri in artist_uris:
+            artist = cache.get(uri) if cache is not None else None
+            if artist is None:
+                missing.append(uri)
+            else:
+                resolved[uri] = artist
+        if missing:
+            artists = await self.artists(missing)
+            for uri, artist in zip(missing, artists):
+                resolved[uri] = artist
+                if cache is not None:
+                    cache.put(uri, artist)
+        return {uri: resolved.get(uri) for uri in artist_uris}
+
+    async def artist_albums(self, artist_id, include_groups=None, country=None, limit=20, offset=0):
+        """Fetches a page of an artist's albums/singles.
+
+        With a response cache, the request carries the cached page's ETag / Last-Modified and a
+        304 Not Modified is answered from the cache.
+        """
+        artist_id = artist_id_from_uri(artist_id)
+        if self.response_cache is None:
+            return await self._call(self.sp.artist_albums, artist_id, include_groups=include_groups,
+                                    country=country, limit=limit, offset=offset)
+        params = {'include_groups': include_groups, 'market': country, 'limit': limit, 'offset': offset}
+        params = {key: value for key, value in params.items() if value is not None}
+        cache_key = f"albums:{artist_id}:{include_groups}:{country}:{limit}:{offset}"
+        return await self._call(self._conditional_get, f"artists/{artist_id}/albums", params, cache_key)
+
+    def _conditional_get(self, path, params, cache_key):
+        """GETs an API path with If-None-Match / If-Modified-Since from the cache (runs on a worker thread)."""
+        cached = self.response_cache.get(cache_key)
+        entry = json.loads(cached) if cached else None
+        headers = self.sp._auth_headers()
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        response = self.sp._session.get(self.sp.prefix + path, params=params, headers=headers,
+                                        timeout=self.sp.requests_timeout)
+        if response.status_code == 304 and entry:
+            with self._counter_lock:
+                self.not_modified += 1
+            return entry['body']
+        if response.status_code >= 400:
+            try:
+                msg = response.json().get('error', {}).get('message')
+            except ValueError:
+                msg = response.text or None
+            # Same exception spotipy raises, so RetryPolicy and callers handle both paths alike
+            raise spotipy.exceptions.SpotifyException(response.status_code, -1, f"{response.url}:\n {msg}",
+                                                      headers=response.headers)
+        body = response.json()
+        with self._counter_lock:
+            self.modified += 1
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.response_cache.set(cache_key, json.dumps({'etag': etag, 'last_modified': last_modified, 'body': body}),
+                                    ttl=ALBUMS_CACHE_TTL)
+        return body
+
+    async def new_releases(self, country=None, limit=50, offset=0):
+        """Fetches a page of Spotify's global new-releases list ({'albums': paging object})."""
+        return await self._call(self.sp.new_releases, country=country, limit=limit, offset=offset)
+
+    async def search_albums(self, query, market=None, limit=50, offset=0):
+        """Fetches a page of album search results, e.g. for 'tag:new' ({'albums': paging object})."""
+        return await self._call(self.sp.search, query, limit=limit, offset=offset, type='album', market=market)
+
+    async def playlist_artist_uris(self, playlist_id):
+        """Returns the URIs of every artist credited on a playlist's tracks, in first-seen order.
+
+        The first page tells us the total, then the remaining pages are fetched concurrently.
+        """
+        fields = 'items(track(artists(uri))),total'
+        async def fetch_page(offset):
+            return await self._call(self.sp.playlist_items, playlist_id, fields=fields, limit=PLAYLIST_PAGE_SIZE,
+                                    offset=offset, additional_types=('track',))
+
+        first_page = await fetch_page(0) or {}
+        total = first_page.get('total') or 0
+        pages = [first_page] + list(await asyncio.gather(
+            *(fetch_page(offset) for offset in range(PLAYLIST_PAGE_SIZE, total, PLAYLIST_PAGE_SIZE))))
+
+        artist_uris = {} # Ordered set
+        for page in pages:
+            for entry in (page or {}).get('items') or []:
+                track = entry.get('track') or {} # None for removed/local tracks
+                for artist in track.get('artists') or []:
+                    uri = artist.get('uri')
+                    if uri and uri.startswith('spotify:artist:'):
+                        artist_uris[uri] = None
+        return list(artist_uris)
+
+    def stats(self):
+        """Returns request and conditional-request counters."""
+        with self._counter_lock:
+            not_modified, modified = self.not_modified, self.modified
+        revalidated = not_modified + modified
+        return {
+            'requests': self.requests_made,
+            'not_modified': not_modified,
+            'modified': modified,
+            'not_modified_rate': (not_modified / revalidated) if revalidated else 0.0,
+        }
+
+    def close(self):
+        """Stops the worker threads (pending calls are abandoned)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import re
+
+import aiohttp
+
+# --- Settings ---
+SHORT_LINK_TIMEOUT = float(os.environ.get("SHORT_LINK_TIMEOUT", 5)) # Seconds per spotify.link redirect
+MAX_SHORT_LINKS = int(os.environ.get("MAX_SHORT_LINKS", 50)) # Per message; each costs one HTTP request
+SHORT_LINK_BODY_BYTES = 64 * 1024 # Enough of the landing page to find the open.spotify.com link
+
+# Compiled once; open.spotify.com links may carry a locale segment (/intl-de/) and a ?si= query
+ARTIST_LINK_PATTERN = re.compile(
+    r'(?:https?://open\.spotify\.com/(?:intl-[a-zA-Z-]+/)?artist/|spotify:artist:)([a-zA-Z0-9]{22})')
+PLAYLIST_LINK_PATTERN = re.compile(
+    r'(?:https?://open\.spotify\.com/(?:intl-[a-zA-Z-]+/)?playlist/|spotify:playlist:)([a-zA-Z0-9]{22})')
+SHORT_LINK_PATTERN = re.compile(r'https?://spotify\.(?:link|app\.link)/[a-zA-Z0-9_-]+')
+OPEN_LINK_PATTERN = re.compile(r'https://open\.spotify\.com/[^"\'\s<>]+')
+
+log = logging.getLogger(__name__)
+
+
+def parse_artist_links(text):
+    """Returns {artist_uri: original input} for every artist link/URI in text, first occurrence first.
+
+    Repeats of the same artist (as a link, a URI or both) collapse into one entry in a single pass.
+    """
+    artists = {}
+    for match in ARTIST_LINK_PATTERN.finditer(text):
+        artists.setdefault(f"spotify:artist:{match.group(1)}", match.group(0))
+    return artists
+
+
+def parse_playlist_ids(text):
+    """Returns the unique playlist IDs linked in text, in order."""
+    return list(dict.fromkeys(PLAYLIST_LINK_PATTERN.findall(text)))
+
+
+def classify_artists(artist_uris, subscribed_here, tracked):
+    """Splits artist URIs (in order) into (already followed here, tracked for another channel, new to the bot).
+
+    Only the last group needs verifying against Spotify; the other two are answered from local sets.
+    """
+    artist_uris = list(dict.fromkeys(artist_uris))
+    already = subscribed_here.intersection(artist_uris)
+    known = tracked.intersection(artist_uris) - already
+    return ([uri for uri in artist_uris if uri in already],
+            [uri for uri in artist_uris if uri in known],
+            [uri for uri in artist_uris if uri not in already and uri not in known])
+
+
+async def resolve_short_links(links):
+    """Follows spotify.link short links; returns {short link: open.spotify.com URL, or None if unresolved}.
+
+    All links share one HTTP session and are resolved concurrently. Links past MAX_SHORT_LINKS
+    aren't fetched and map to None, so callers report them as unresolved.
+    """
+    links = list(dict.fromkeys(links))
+    skipped = dict.fromkeys(links[MAX_SHORT_LINKS:])
+    links = links[:MAX_SHORT_LINKS]
+    if skipped:
+        log.warning("short_link.over_limit links=%d limit=%d", len(links) + len(skipped), MAX_SHORT_LINKS)
+    if not links:
+        return skipped
+
+    async def resolve(session, link):
+        try:
+            async with session.get(link, allow_redirects=True) as response:
+                final_url = str(response.url)
+                if 'open.spotify.com/' in final_url:
+                    return final_url
+                # Some short links land on an interstitial page that carries the real link in its markup
+                body = (await response.content.read(SHORT_LINK_BODY_BYTES)).decode('utf-8', errors='replace')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning("short_link.failed link=%s error=%s: %s", link, type(e).__name__, e)
+            return None
+        match = OPEN_LINK_PATTERN.search(body)
+        return match.group(0) if match else None
+
+    timeout = aiohttp.ClientTimeout(total=SHORT_LINK_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        resolved = await asyncio.gather(*(resolve(session, link) for link in links))
+    log.debug("short_link.resolved links=%d ok=%d", len(links), sum(1 for url in resolved if url))
+    return {**dict(zip(links, resolved)), **skipped}
+
+
+async def extract_links(text):
+    """Parses artist and playlist links from text, expanding spotify.link short links.
+
+    Returns {'artists': {artist_uri: original input}, 'playlists': [IDs], 'unresolved': [short links]}.
+    A short link's original input is the short link itself, so error messages echo what the user typed.
+    """
+    artists = parse_artist_links(text)
+    playlists = parse_playlist_ids(text)
+    unresolved = []
+    resolved = await resolve_short_links(SHORT_LINK_PATTERN.findall(text))
+    for link, url in resolved.items():
+        found = parse_artist_links(url or '')
+        for uri in found:
+            artists.setdefault(uri, link)
+        playlist_ids = parse_playlist_ids(url or '')
+        playlists.extend(playlist_id for playlist_id in playlist_ids if playlist_id not in playlists)
+        if not found and not playlist_ids:
+            unresolved.append(link)
+    return {'artists': artists, 'playlists': playlists, 'unresolved': unresolved}
@@ -0,0 +1,47 @@
+import logging
+import time
+
+# Phases in report order; "imports" is only recorded when started through main.py
+STARTUP_PHASES = ("imports", "state", "gateway", "auth", "first_sweep")
+
+log = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records how long each startup phase took and logs one summary after the first sweep."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started_at = clock() # Roughly process start when created by the first import
+        self._starts = {}
+        self.durations = {} # phase -> seconds
+        self.reported = False
+
+    def start(self, phase):
+        """Marks the beginning of a phase."""
+        self._starts[phase] = self._clock()
+
+    def end(self, phase):
+        """Marks the end of a phase (no-op if it never started or already ended)."""
+        started = self._starts.pop(phase, None)
+        if started is not None and phase not in self.durations:
+            self.durations[phase] = self._clock() - started
+
+    def total(self):
+        """Seconds since the timer was created."""
+        return self._clock() - self.started_at
+
+    def report(self):
+        """One-line breakdown, e.g. 'imports 0.41s · state 0.02s · gateway 1.30s · ... (ready in 2.1s)'."""
+        parts = [f"{phase} {self.durations[phase]:.2f}s" for phase in STARTUP_PHASES if phase in self.durations]
+        return f"{' · '.join(parts)} (ready in {self.total():.1f}s)"
+
+    def report_when_complete(self):
+        """Logs the report once, after the first sweep (the last phase) has finished."""
+        if not self.reported and "first_sweep" in self.durations:
+            self.reported = True
+            log.info("startup.timing %s", self.report())
+
+
+# Shared by main.py (imports) and bot.py (everything else)
+startup_timer = StartupTimer()
@@ -0,0 +1,446 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+
+# --- Settings ---
+# On Render this must live on a Persistent Disk to survive redeploys
+BOT_DB_PATH = os.environ.get("BOT_DB_PATH", "bot_data.sqlite3")
+# File written by the old (commented-out) JSON persistence in bot.py
+LEGACY_ARTIST_FILE = os.environ.get("LEGACY_ARTIST_FILE", "tracked_artists.json")
+# Sweep workers and the bot share the database; wait this long for another process's write lock
+DB_BUSY_TIMEOUT = float(os.environ.get("DB_BUSY_TIMEOUT", 30))
+
+log = logging.getLogger(__name__)
+
+# Each entry upgrades the schema by one version (PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS artists (
+        uri TEXT PRIMARY KEY,
+        name TEXT,
+        added_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS announced_releases (
+        release_id TEXT PRIMARY KEY,
+        artist_uri TEXT,
+        announced_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_announced_artist ON announced_releases (artist_uri);
+    CREATE INDEX IF NOT EXISTS idx_announced_at ON announced_releases (announced_at);
+    """,
+    # Last time a release was still returned by Spotify; drives age-based eviction
+    """
+    ALTER TABLE announced_releases ADD COLUMN last_seen REAL;
+    UPDATE announced_releases SET last_seen = announced_at;
+    DROP INDEX IF EXISTS idx_announced_at;
+    CREATE INDEX idx_announced_last_seen ON announced_releases (last_seen);
+    """,
+    # Per-artist high-water marks for incremental release detection
+    """
+    CREATE TABLE artist_state (
+        artist_uri TEXT PRIMARY KEY,
+        total INTEGER,
+        latest_release_date TEXT,
+        signature TEXT,
+        checked_at REAL
+    );
+    CREATE TABLE artist_releases (
+        artist_uri TEXT NOT NULL,
+        release_id TEXT NOT NULL,
+        PRIMARY KEY (artist_uri, release_id)
+    ) WITHOUT ROWID;
+    """,
+    # Which Discord channels follow which artists (artists holds one row per unique artist)
+    """
+    CREATE TABLE subscriptions (
+        channel_id INTEGER NOT NULL,
+        guild_id INTEGER,
+        artist_uri TEXT NOT NULL,
+        added_at REAL NOT NULL,
+        PRIMARY KEY (channel_id, artist_uri)
+    ) WITHOUT ROWID;
+    CREATE INDEX idx_subscriptions_artist ON subscriptions (artist_uri);
+    """,
+    # Worker mode: releases found by sweep workers wait here for the announcer; workers heartbeat here
+    """
+    CREATE TABLE release_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        release_id TEXT NOT NULL,
+        artist_uri TEXT NOT NULL,
+        artist_name TEXT,
+        release_json TEXT NOT NULL,
+        queued_at REAL NOT NULL
+    );
+    CREATE TABLE workers (
+        worker_id TEXT PRIMARY KEY,
+        started_at REAL NOT NULL,
+        heartbeat_at REAL NOT NULL
+    );
+    """,
+    # Announcements waiting to be posted, one row per (release, channel), so a restart doesn't lose them
+    """
+    CREATE TABLE announcement_outbox (
+        release_id TEXT NOT NULL,
+        channel_id INTEGER NOT NULL,
+        artist_uri TEXT NOT NULL,
+        artist_name TEXT,
+        release_json TEXT NOT NULL,
+        queued_at REAL NOT NULL,
+        PRIMARY KEY (release_id, channel_id)
+    ) WITHOUT ROWID;
+    """,
+    # Where a scan stopped at the page cap, so the next one continues there instead of at page 1
+    """
+    ALTER TABLE artist_state ADD COLUMN resume_offset INTEGER;
+    """,
+    # Lookups by release across all artists (release-day burst, dedup eviction) instead of full scans
+    """
+    CREATE INDEX idx_artist_releases_release ON artist_releases (release_id);
+    """,
+]
+
+
+class Storage:
+    """SQLite (WAL mode) store for tracked artists and announced release IDs.
+
+    Writes are small single transactions, so callers write through on every change.
+    """
+
+    def __init__(self, path=BOT_DB_PATH):
+        self.path = path
+        # Autocommit; explicit BEGIN for batches
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=DB_BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL, much cheaper than FULL
+        self._migrate()
+
+    def _migrate(self):
+        # The bot and its sweep workers open the database at the same time, so the version is read and
+        # each step applied under the write lock; whoever gets the lock second sees the new version
+        while True:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(MIGRATIONS):
+                    return
+                # executescript() would commit the open transaction, so statements run one at a time
+                for statement in MIGRATIONS[version].split(';'):
+                    if statement.strip():
+                        self.conn.execute(statement)
+                self.conn.execute(f"PRAGMA user_version = {version + 1}")
+
+    def close(self):
+        self.conn.close()
+
+    # --- Artists ---
+
+    def load_artists(self):
+        """Returns {artist_uri: name or None} for every tracked artist in one query."""
+        return dict(self.conn.execute("SELECT uri, name FROM artists"))
+
+    def add_artists(self, artists):
+        """Inserts or renames artists from an iterable of (uri, name) pairs."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT INTO artists (uri, name, added_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(uri) DO UPDATE SET name = COALESCE(excluded.name, artists.name)",
+                ((uri, name, now) for uri, name in artists),
+            )
+
+    def rename_artists(self, artists):
+        """Sets names from (uri, name) pairs; artists no longer tracked are not added back."""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("UPDATE artists SET name = ? WHERE uri = ?", ((name, uri) for uri, name in artists))
+
+    def remove_artists(self, uris):
+        """Deletes the given artist URIs along with their high-water marks and subscriptions."""
+        rows = [(uri,) for uri in uris]
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("DELETE FROM artists WHERE uri = ?", rows)
+            self.conn.executemany("DELETE FROM artist_state WHERE artist_uri = ?", rows)
+            self.conn.executemany("DELETE FROM artist_releases WHERE artist_uri = ?", rows)
+            self.conn.executemany("DELETE FROM subscriptions WHERE artist_uri = ?", rows)
+
+    # --- Channel subscriptions ---
+
+    def load_subscriptions(self):
+        """Returns {artist_uri: set of channel IDs} in one query."""
+        subscriptions = {}
+        for channel_id, artist_uri in self.conn.execute("SELECT channel_id, artist_uri FROM subscriptions"):
+            subscriptions.setdefault(artist_uri, set()).add(channel_id)
+        return subscriptions
+
+    def subscribe(self, channel_id, guild_id, artist_uris):
+        """Subscribes a channel to the given artists (existing subscriptions are kept)."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO subscriptions (channel_id, guild_id, artist_uri, added_at) VALUES (?, ?, ?, ?)",
+                ((channel_id, guild_id, uri, now) for uri in artist_uris),
+            )
+
+    def unsubscribe(self, channel_id, artist_uris):
+        """Removes a channel's subscriptions to the given artists."""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "DELETE FROM subscriptions WHERE channel_id = ? AND artist_uri = ?",
+                ((channel_id, uri) for uri in artist_uris),
+            )
+
+    def unsubscribed_artists(self):
+        """Returns tracked artist URIs that no channel is subscribed to (e.g. from before subscriptions)."""
+        return [row[0] for row in self.conn.execute(
+            "SELECT uri FROM artists WHERE uri NOT IN (SELECT artist_uri FROM subscriptions)")]
+
+    # --- Per-artist high-water marks ---
+
+    def load_artist_states(self, uris=None):
+        """Returns {artist_uri: {'total', 'latest_release_date', 'signature', 'resume_offset'}} for all (or the given) artists."""
+        query = "SELECT artist_uri, total, latest_release_date, signature, resume_offset FROM artist_state"
+        if uris is None:
+            rows = self.conn.execute(query)
+        else:
+            uris = list(uris)
+            rows = []
+            for start in range(0, len(uris), 500): # Stay under SQLite's bound-parameter limit
+                chunk = uris[start:start + 500]
+                rows.extend(self.conn.execute(f"{query} WHERE artist_uri IN ({','.join('?' * len(chunk))})", chunk))
+        return {
+            uri: {'total': total, 'latest_release_date': latest, 'signature': signature, 'resume_offset': resume_offset}
+            for uri, total, latest, signature, resume_offset in rows
+        }
+
+    def load_known_release_ids(self, artist_uri):
+        """Returns the set of release IDs already seen for one artist."""
+        return {row[0] for row in self.conn.execute(
+            "SELECT release_id FROM artist_releases WHERE artist_uri = ?", (artist_uri,))}
+
+    def known_release_ids_among(self, release_ids):
+        """Returns which of release_ids are known for any artist, in one query per 500 IDs.
+
+        Uses its own connection, so it can run on a worker thread (asyncio.to_thread) while the
+        event loop keeps using self.conn.
+        """
+        release_ids = list(release_ids)
+        known = set()
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT)
+        try:
+            for start in range(0, len(release_ids), 500): # Stay under SQLite's bound-parameter limit
+                chunk = release_ids[start:start + 500]
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT DISTINCT release_id FROM artist_releases WHERE release_id IN ({','.join('?' * len(chunk))})",
+                    chunk))
+        finally:
+            conn.close()
+        return known
+
+    def record_scan(self, artist_uri, release_ids, state, checked_at, announcements=()):
+        """Saves one artist's scan result in a single transaction: new known release IDs, the
+        high-water mark, and the announcements it produced (see queue_announcements).
+
+        Either all of it is stored or none of it, so a crash can't leave releases marked as seen
+        without their announcements.
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._save_scan(artist_uri, release_ids, state, checked_at)
+            self._insert_announcements(announcements, now)
+
+    def record_queued_scan(self, artist_uri, release_ids, state, checked_at, releases=()):
+        """Worker-mode record_scan: stores the scan and queues its (release dict, artist_uri, artist_name)
+        tuples for the announcer in one transaction.
+
+        Nothing is written if the artist was removed in the meantime; returns whether it was stored.
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            if self.conn.execute("SELECT 1 FROM artists WHERE uri = ?", (artist_uri,)).fetchone() is None:
+                return False
+            self._save_scan(artist_uri, release_ids, state, checked_at)
+            self.conn.executemany(
+                "INSERT INTO release_queue (release_id, artist_uri, artist_name, release_json, queued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((release['id'], artist_uri, artist_name, json.dumps(release), now)
+                 for release, artist_uri, artist_name in releases),
+            )
+            return True
+
+    def _save_scan(self, artist_uri, release_ids, state, checked_at):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO artist_releases (artist_uri, release_id) VALUES (?, ?)",
+            ((artist_uri, release_id) for release_id in release_ids),
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO artist_state "
+            "(artist_uri, total, latest_release_date, signature, resume_offset, checked_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (artist_uri, state['total'], state['latest_release_date'], state['signature'], state.get('resume_offset'),
+             checked_at),
+        )
+
+    # --- Announcement outbox ---
+
+    def _insert_announcements(self, announcements, now):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO announcement_outbox "
+            "(release_id, channel_id, artist_uri, artist_name, release_json, queued_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ((release['id'], channel_id, artist_uri, artist_name, json.dumps(release), now)
+             for channel_id, release, artist_name, artist_uri in announcements),
+        )
+
+    def queue_announcements(self, announcements):
+        """Stores (channel_id, release dict, artist_name, artist_uri) tuples until they're posted."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._insert_announcements(announcements, now)
+
+    def pending_announcements(self):
+        """Returns every stored (channel_id, release dict, artist_name, artist_uri), oldest first."""
+        return [(channel_id, json.loads(release_json), artist_name, artist_uri)
+                for channel_id, release_json, artist_name, artist_uri in self.conn.execute(
+                    "SELECT channel_id, release_json, artist_name, artist_uri FROM announcement_outbox "
+                    "ORDER BY queued_at")]
+
+    def complete_announcements(self, channel_id, releases):
+        """Records (release_id, artist_uri) pairs as posted to a channel: marks them announced and
+        removes that channel's outbox rows, in one transaction."""
+        releases = list(releases)
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO announced_releases (release_id, artist_uri, announced_at, last_seen) "
+                "VALUES (?, ?, ?, ?)",
+                ((release_id, artist_uri, now, now) for release_id, artist_uri in releases),
+            )
+            self.conn.executemany(
+                "DELETE FROM announcement_outbox WHERE release_id = ? AND channel_id = ?",
+                ((release_id, channel_id) for release_id, _ in releases),
+            )
+
+    def drop_announcements(self, channel_id, release_ids):
+        """Removes a channel's outbox rows without marking the releases announced."""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "DELETE FROM announcement_outbox WHERE release_id = ? AND channel_id = ?",
+                ((release_id, channel_id) for release_id in release_ids),
+            )
+
+    # --- Announced releases ---
+
+    def load_announced_releases(self):
+        """Returns (release_id, last_seen) for every announced release, in one query."""
+        return self.conn.execute("SELECT release_id, last_seen FROM announced_releases").fetchall()
+
+    def is_announced(self, release_id):
+        """True if release_id has been posted to at least one channel or is waiting in the outbox."""
+        return self.conn.execute(
+            "SELECT 1 FROM announced_releases WHERE release_id = ? "
+            "UNION ALL SELECT 1 FROM announcement_outbox WHERE release_id = ? LIMIT 1",
+            (release_id, release_id)).fetchone() is not None
+
+    def touch_announced(self, release_ids, seen):
+        """Updates last_seen for releases that are still being returned by Spotify."""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "UPDATE announced_releases SET last_seen = ? WHERE release_id = ?",
+                ((seen, release_id) for release_id in release_ids),
+            )
+
+    def refresh_known_announced(self, cutoff, seen):
+        """Sets last_seen to `seen` for releases last seen before cutoff that an artist still lists
+        (they're in artist_releases), so eviction only drops releases gone from every discography.
+
+        Returns the refreshed release IDs.
+        """
+        with self.conn:
+            self.conn.execute("BEGIN")
+            release_ids = [row[0] for row in self.conn.execute(
+                "SELECT release_id FROM announced_releases WHERE last_seen < ? AND EXISTS "
+                "(SELECT 1 FROM artist_releases WHERE artist_releases.release_id = announced_releases.release_id)",
+                (cutoff,))]
+            self.conn.executemany(
+                "UPDATE announced_releases SET last_seen = ? WHERE release_id = ?",
+                ((seen, release_id) for release_id in release_ids),
+            )
+        return release_ids
+
+    def prune_announced(self, cutoff):
+        """Deletes releases last seen before cutoff (Unix seconds). Returns the number deleted."""
+        return self.conn.execute("DELETE FROM announced_releases WHERE last_seen < ?", (cutoff,)).rowcount
+
+    # --- Migration from the old JSON file ---
+
+    def import_legacy_json(self, path=LEGACY_ARTIST_FILE):
+        """Imports artist URIs from the old tracked_artists.json list, then renames the file.
+
+        Returns the number of URIs imported (0 if there was no file).
+        """
+        try:
+            with open(path, 'r') as f:
+                artist_list = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (json.JSONDecodeError, OSError) as e:
+            log.error("storage.legacy_import_failed path=%s error=%s", path, e)
+            return 0
+        if not isinstance(artist_list, list):
+            log.warning("storage.legacy_import_skipped path=%s reason=not_a_list", path)
+            return 0
+        valid_uris = [uri for uri in artist_list if isinstance(uri, str) and uri.startswith("spotify:artist:")]
+        self.add_artists((uri, None) for uri in valid_uris)
+        os.replace(path, path + ".migrated") # Don't import it again on the next start
+        log.info("storage.legacy_imported artists=%d path=%s db=%s", len(valid_uris), path, self.path)
+        return len(valid_uris)
+
+    # --- Worker mode: release queue and worker membership ---
+
+    def queued_releases(self, limit=500):
+        """Returns up to `limit` queued (queue_id, release dict, artist_uri, artist_name), oldest first.
+
+        Rows stay queued until dequeue_releases() removes them, so a crash in between loses nothing.
+        """
+        return [(queue_id, json.loads(release_json), artist_uri, artist_name)
+                for queue_id, release_json, artist_uri, artist_name in self.conn.execute(
+                    "SELECT id, release_json, artist_uri, artist_name FROM release_queue ORDER BY id LIMIT ?",
+                    (limit,))]
+
+    def dequeue_releases(self, queue_ids, announcements=()):
+        """Removes queue rows and stores the announcements made from them in one transaction."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("DELETE FROM release_queue WHERE id = ?", ((queue_id,) for queue_id in queue_ids))
+            self._insert_announcements(announcements, now)
+
+    def queued_release_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM release_queue").fetchone()[0]
+
+    def heartbeat_worker(self, worker_id):
+        """Registers a sweep worker or refreshes its heartbeat."""
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO workers (worker_id, started_at, heartbeat_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+            (worker_id, now, now))
+
+    def remove_worker(self, worker_id):
+        """Deregisters a worker that is shutting down, so its artists move right away."""
+        self.conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def live_workers(self, timeout):
+        """Returns the IDs of workers that heartbeated within the last `timeout` seconds, sorted."""
+        return [row[0] for row in self.conn.execute(
+            "SELECT worker_id FROM workers WHERE heartbeat_at >= ? ORDER BY worker_id", (time.time() - timeout,))]
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import os
+import time
+
+# --- Settings ---
+# How many artists are checked at once; actual request pacing comes from the shared rate limiter
+SWEEP_CONCURRENCY = int(os.environ.get("SWEEP_CONCURRENCY", 8))
+
+log = logging.getLogger(__name__)
+
+
+async def run_sweep(items, check_item, concurrency=SWEEP_CONCURRENCY):
+    """Runs `await check_item(item)` for every item with at most `concurrency` in flight.
+
+    Errors raised by check_item are caught per item so one bad artist can't stop the sweep.
+    Returns a summary dict with counts and wall-clock duration.
+    """
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    summary = {'checked': 0, 'failed': 0}
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await check_item(item)
+                summary['checked'] += 1
+            except Exception as e:
+                summary['failed'] += 1
+                # Full traceback only at DEBUG; one bad artist shouldn't flood the logs
+                log.warning("sweep.item_failed item=%s error=%s: %s", item, type(e).__name__, e,
+                            exc_info=log.isEnabledFor(logging.DEBUG))
+
+    started = time.monotonic()
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, queue.qsize())))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers: # Only matters if the sweep itself was cancelled
+            task.cancel()
+    summary['duration'] = time.monotonic() - started
+    return summary
@@ -0,0 +1,197 @@
+"""Sweep worker process for worker mode (SWEEP_WORKERS > 0).
+
+Each worker owns the artists a consistent hash ring assigns it, checks them with its own Spotify
+credentials and rate limiter, and queues new releases in the shared SQLite database; the bot
+process announces them. main.py starts SWEEP_WORKERS of these; another one can be started by hand
+(`python worker.py 4`) and the ring rebalances on its next heartbeat.
+"""
+import asyncio
+import logging
+import os
+import random
+import signal
+import sys
+import time
+
+import spotipy
+from spotipy.oauth2 import SpotifyClientCredentials
+
+from artist_cache import ArtistCache
+from rate_limit import TokenBucket
+from release_scan import scan_artist
+from retry_policy import RetryPolicy
+from scheduler import PollScheduler, activity_interval
+from sharding import HashRing
+from shared_cache import open_cache, SharedTokenCacheHandler
+from spotify_client import AsyncSpotify, build_session
+from storage import Storage
+from sweep import run_sweep
+
+# --- Settings ---
+# Number of sweep worker processes main.py starts; 0 keeps the sweep inside the bot process
+SWEEP_WORKERS = int(os.environ.get("SWEEP_WORKERS", 0))
+WORKER_TICK_SECONDS = float(os.environ.get("WORKER_TICK_SECONDS", 60)) # Same cadence as the in-process loop
+WORKER_HEARTBEAT_SECONDS = float(os.environ.get("WORKER_HEARTBEAT_SECONDS", 15))
+# A worker that hasn't heartbeated for this long is considered gone and its artists move to the others
+WORKER_TIMEOUT = float(os.environ.get("WORKER_TIMEOUT", 90))
+# Set by main.py for the workers it starts; they stop if that process goes away without stopping them
+SWEEP_WORKER_PARENT_PID = os.environ.get("SWEEP_WORKER_PARENT_PID")
+
+log = logging.getLogger(__name__)
+
+
+def worker_credentials(index):
+    """(client_id, client_secret) for worker `index`: SPOTIPY_CLIENT_ID_<index> if set, else the shared pair.
+
+    Separate credentials give each worker its own Spotify rate budget, which is what makes
+    capacity grow with the number of workers.
+    """
+    client_id = os.environ.get(f"SPOTIPY_CLIENT_ID_{index}") or os.environ.get("SPOTIPY_CLIENT_ID")
+    client_secret = os.environ.get(f"SPOTIPY_CLIENT_SECRET_{index}") or os.environ.get("SPOTIPY_CLIENT_SECRET")
+    return client_id, client_secret
+
+
+class SweepWorker:
+    """Checks the artists this worker owns on the hash ring and queues what's new."""
+
+    def __init__(self, worker_id, spotify, storage):
+        self.worker_id = worker_id
+        self.spotify = spotify
+        self.storage = storage
+        self.scheduler = PollScheduler()
+        self.owned = set()
+        self.names = {} # artist_uri -> stored name (None if not resolved yet)
+
+    def rebalance(self):
+        """Recomputes which artists this worker owns from the live workers and the tracked artists."""
+        self.storage.heartbeat_worker(self.worker_id)
+        ring = HashRing(self.storage.live_workers(WORKER_TIMEOUT))
+        ring.add(self.worker_id) # Always own something, even if our own heartbeat looks stale
+        self.names = self.storage.load_artists()
+        owned = {uri for uri in self.names if ring.node_for(uri) == self.worker_id}
+        gained = owned - self.owned
+        lost = self.owned - owned
+        if gained:
+            # Artists moved from another worker keep their stored high-water marks; spread them like a restart
+            states = self.storage.load_artist_states(gained)
+            now = time.time()
+            for uri in gained:
+                state = states.get(uri)
+                if state:
+                    self.scheduler.add(uri, now + random.uniform(0, activity_interval(state['latest_release_date'], now)))
+                else:
+                    self.scheduler.add(uri) # Never checked: due now
+        for uri in lost:
+            self.scheduler.remove(uri)
+        if gained or lost:
+            log.info("worker.rebalanced worker=%s workers=%d owned=%d gained=%d lost=%d",
+                     self.worker_id, len(ring), len(owned), len(gained), len(lost))
+        self.owned = owned
+
+    async def sweep(self):
+        """Checks the owned artists that are due and queues their new releases for the announcer."""
+        due = self.scheduler.pop_due()
+        if not due:
+            return
+        try:
+            # Read state from the database each time: ownership moves between workers
+            states = self.storage.load_artist_states(due)
+            unnamed = [uri for uri in due if not self.names.get(uri)]
+            if unnamed:
+                try:
+                    infos = await self.spotify.artists_by_uri(unnamed)
+                except Exception as e:
+                    log.warning("worker.resolve_names_failed error=%s: %s", type(e).__name__, e)
+                    infos = {}
+                named = [(uri, info['name']) for uri, info in infos.items() if info and info.get('name')]
+                self.storage.rename_artists(named) # Not add_artists: it would bring back artists removed meanwhile
+                self.names.update(named)
+            checked_at = time.time()
+            queued = []
+
+            async def check_artist(artist_uri):
+                artist_id = artist_uri.split(':')[-1]
+                try:
+                    new_items, seen_ids, state, _ = await scan_artist(
+                        self.spotify, artist_id, states.get(artist_uri),
+                        lambda: self.storage.load_known_release_ids(artist_uri))
+                except Exception:
+                    self.scheduler.reschedule(artist_uri, (states.get(artist_uri) or {}).get('latest_release_date'))
+                    raise
+                self.scheduler.reschedule(artist_uri, state['latest_release_date'], found_new=bool(new_items))
+                if not seen_ids and state == states.get(artist_uri):
+                    return # First page unchanged: nothing to write
+                # The announcer dedups against its own set; this only skips what was posted long ago
+                fresh = [item for item in new_items if not self.storage.is_announced(item['id'])]
+                artist_name = self.names.get(artist_uri) or f'Unknown Artist ({artist_id})'
+                # Like the in-process sweep, the high-water mark and the queued releases are stored together
+                # (and not at all if the artist was removed while it was being checked)
+                if self.storage.record_queued_scan(artist_uri, seen_ids, state, checked_at,
+                                                   [(item, artist_uri, artist_name) for item in fresh]):
+                    queued.extend(fresh)
+
+            summary = await run_sweep(due, check_artist)
+            log.info("worker.sweep worker=%s checked=%d failed=%d queued=%d duration=%.1fs", self.worker_id,
+                     summary['checked'], summary['failed'], len(queued), summary['duration'])
+        finally:
+            self.scheduler.requeue(due)
+
+    async def heartbeat_loop(self):
+        # Separate from the sweep, so a long sweep doesn't make this worker look dead
+        while True:
+            await asyncio.sleep(WORKER_HEARTBEAT_SECONDS)
+            if SWEEP_WORKER_PARENT_PID and os.getppid() != int(SWEEP_WORKER_PARENT_PID):
+                # The bot was killed without terminating us; stop through the SIGTERM path to deregister
+                log.warning("worker.orphaned worker=%s parent=%s", self.worker_id, SWEEP_WORKER_PARENT_PID)
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            self.storage.heartbeat_worker(self.worker_id)
+
+    async def run(self):
+        heartbeat = asyncio.create_task(self.heartbeat_loop())
+        try:
+            while True:
+                tick_started = time.monotonic()
+                try:
+                    self.rebalance()
+                    await self.sweep()
+                except Exception:
+                    log.exception("worker.tick_failed worker=%s", self.worker_id)
+                await asyncio.sleep(max(0.0, WORKER_TICK_SECONDS - (time.monotonic() - tick_started)))
+        finally:
+            heartbeat.cancel()
+
+
+def run_worker(index):
+    """Process entry point: runs worker `index` until it's stopped."""
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+                        format=f"%(asctime)s %(levelname)-7s worker-{index} %(name)s: %(message)s")
+    worker_id = f"worker-{index}"
+    client_id, client_secret = worker_credentials(index)
+    if not (client_id and client_secret):
+        log.error("worker.no_credentials worker=%s", worker_id)
+        return
+    cache = open_cache()
+    auth_manager = SpotifyClientCredentials(client_id=client_id, client_secret=client_secret,
+                                            cache_handler=SharedTokenCacheHandler(cache, client_id))
+    sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=build_session())
+    # Own limiter and retry policy: each worker spends its own credentials' budget
+    spotify = AsyncSpotify(sp, artist_cache=ArtistCache(), rate_limiter=TokenBucket(), retry_policy=RetryPolicy(),
+                           response_cache=cache)
+    storage = Storage()
+    worker = SweepWorker(worker_id, spotify, storage)
+    # SIGTERM (e.g. a redeploy) exits through the finally below, so the worker deregisters right away
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    log.info("worker.started worker=%s", worker_id)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        storage.remove_worker(worker_id)
+        spotify.close()
+        log.info("worker.stopped worker=%s", worker_id)
+
+
+if __name__ == "__main__":
+    run_worker(int(sys.argv[1]) if len(sys.argv) > 1 else 1)